@@ -1,11 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
-from app.models.schemas import Announcement, AnnouncementCreate, AnnouncementUpdate, User
-from app.core.supabase import supabase
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from typing import List, Optional
+from app.models.schemas import Announcement, AnnouncementCreate, AnnouncementUpdate, AnnouncementChanges, User
+from app.core.config import settings
+from app.core.database import table, execute
+from app.core.response_cache import response_cache, cache_key
+from app.core.pubsub import hub
 from app.api.dependencies import get_current_user, get_current_teacher_user
+from app.api.pagination import PageParams, select_columns, paginate, page_response
+from app.api.conditional import conditional_response
+from app.api.changes import fetch_changes
 
 router = APIRouter()
 
+def is_visible_to(announcement: dict, role: str) -> bool:
+    """Whether a role is in an announcement's target audience"""
+    if role in ("student", "teacher"):
+        return announcement.get("target_audience") in (role, "all")
+    return True
+
 @router.post("/", response_model=Announcement, status_code=status.HTTP_201_CREATED)
 async def create_announcement(
     announcement: AnnouncementCreate,
@@ -14,10 +26,14 @@ async def create_announcement(
     """Create a new announcement (Teacher/Admin only)"""
     try:
         announcement_data = announcement.model_dump()
-        response = supabase.table("announcements").insert(announcement_data).execute()
+        response = await execute(table("announcements").insert(announcement_data))
+        await response_cache.invalidate("announcements")
+        hub.publish("announcements", "created", response.data[0])
         
         return Announcement(**response.data[0])
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -25,19 +41,70 @@ async def create_announcement(
         )
 
 @router.get("/", response_model=List[Announcement])
-async def get_all_announcements(current_user: User = Depends(get_current_user)):
+async def get_all_announcements(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: User = Depends(get_current_user)
+):
     """Get all announcements"""
     try:
+        query = table("announcements").select(select_columns(Announcement, page, "created_at"))
+        
         # Filter by target audience if user is student or teacher
         if current_user.role == "student":
-            response = supabase.table("announcements").select("*").in_("target_audience", ["student", "all"]).order("created_at", desc=True).execute()
+            query = query.in_("target_audience", ["student", "all"])
         elif current_user.role == "teacher":
-            response = supabase.table("announcements").select("*").in_("target_audience", ["teacher", "all"]).order("created_at", desc=True).execute()
-        else:
-            response = supabase.table("announcements").select("*").order("created_at", desc=True).execute()
+            query = query.in_("target_audience", ["teacher", "all"])
+        
+        # The role is part of the key, so each audience gets its own entries
+        rows = await response_cache.fetch(
+            cache_key("announcements:list", current_user.role, request.query_params.multi_items()),
+            ["announcements"],
+            paginate(query, page, "created_at", desc=True)
+        )
+        
+        not_modified = conditional_response(request, response, rows, compact=page.compact)
+        if not_modified is not None:
+            return not_modified
+        
+        return page_response(rows, page, Announcement, "created_at", response)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/changes", response_model=AnnouncementChanges)
+async def get_announcement_changes(
+    since: Optional[str] = Query(None, description="Cursor from the previous sync; omit for a full sync"),
+    limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT),
+    current_user: User = Depends(get_current_user)
+):
+    """Get announcements created, updated or deleted since a sync cursor"""
+    try:
+        rows, deleted, cursor, has_more = await fetch_changes("announcements", since, limit)
         
-        return [Announcement(**announcement) for announcement in response.data]
+        # Rows moved out of the caller's audience are reported as deleted
+        changed = []
+        for row in rows:
+            if is_visible_to(row, current_user.role):
+                changed.append(Announcement(**row))
+            else:
+                deleted.append(row["id"])
+        
+        return AnnouncementChanges(
+            changed=changed,
+            deleted=deleted,
+            cursor=cursor,
+            has_more=has_more
+        )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -47,19 +114,29 @@ async def get_all_announcements(current_user: User = Depends(get_current_user)):
 @router.get("/{announcement_id}", response_model=Announcement)
 async def get_announcement(
     announcement_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get announcement by ID"""
     try:
-        response = supabase.table("announcements").select("*").eq("id", announcement_id).execute()
+        rows = await response_cache.fetch(
+            cache_key(f"announcements:item:{announcement_id}", current_user.role),
+            ["announcements"],
+            table("announcements").select("*").eq("id", announcement_id)
+        )
         
-        if not response.data:
+        if not rows:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Announcement not found"
             )
         
-        return Announcement(**response.data[0])
+        not_modified = conditional_response(request, response, rows, single=True)
+        if not_modified is not None:
+            return not_modified
+        
+        return Announcement(**rows[0])
     
     except HTTPException:
         raise
@@ -79,7 +156,8 @@ async def update_announcement(
     try:
         update_data = announcement_update.model_dump(exclude_unset=True)
         
-        response = supabase.table("announcements").update(update_data).eq("id", announcement_id).execute()
+        response = await execute(table("announcements").update(update_data).eq("id", announcement_id))
+        await response_cache.invalidate("announcements")
         
         if not response.data:
             raise HTTPException(
@@ -87,6 +165,8 @@ async def update_announcement(
                 detail="Announcement not found"
             )
         
+        hub.publish("announcements", "updated", response.data[0])
+        
         return Announcement(**response.data[0])
     
     except HTTPException:
@@ -104,7 +184,8 @@ async def delete_announcement(
 ):
     """Delete announcement (Teacher/Admin only)"""
     try:
-        response = supabase.table("announcements").delete().eq("id", announcement_id).execute()
+        response = await execute(table("announcements").delete().eq("id", announcement_id))
+        await response_cache.invalidate("announcements")
         
         if not response.data:
             raise HTTPException(
@@ -112,6 +193,8 @@ async def delete_announcement(
                 detail="Announcement not found"
             )
         
+        hub.publish("announcements", "deleted", response.data[0])
+        
         return None
     
     except HTTPException:
@@ -1,12 +1,86 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from typing import List, Optional
 from datetime import datetime
-from app.models.schemas import Attendance, AttendanceCreate, AttendanceUpdate, User
-from app.core.supabase import supabase
-from app.api.dependencies import get_current_user, get_current_teacher_user
+from postgrest.exceptions import APIError
+from app.models.schemas import (
+    Attendance, AttendanceCreate, AttendanceUpdate, AttendanceStatus, User, UserRole,
+    AttendanceBulkCreate, AttendanceBulkResult, AttendanceBulkResponse,
+    AttendanceCounts, AttendanceStats, StudentCourseAttendanceStats
+)
+from app.core.config import settings
+from app.core.database import table, rpc, execute, is_uuid
+from app.api.dependencies import get_current_user, get_current_teacher_user, get_current_admin_user
+from app.api.pagination import PageParams, select_columns, paginate, page_response
+from app.api.export import ExportParams, export_response
 
 router = APIRouter()
 
+# Statuses that count towards the attendance rate
+ATTENDED_STATUSES = (AttendanceStatus.PRESENT, AttendanceStatus.LATE, AttendanceStatus.STW)
+
+# Postgres unique_violation
+UNIQUE_VIOLATION = "23505"
+
+def _empty_counts() -> dict:
+    return {s.value: 0 for s in AttendanceStatus}
+
+def _with_rate(counts: dict) -> dict:
+    """Add total and attendance_rate to per-status counts"""
+    total = sum(counts[s.value] for s in AttendanceStatus)
+    attended = sum(counts[s.value] for s in ATTENDED_STATUSES)
+    return {
+        **counts,
+        "total": total,
+        "attendance_rate": round(attended / total, 4) if total else 0.0
+    }
+
+def _build_stats(rows: List[dict]):
+    """Fold (student_id, course_id, status, total) rows into overall and per-pair counts"""
+    overall = _empty_counts()
+    groups = {}
+    
+    for row in rows:
+        if row["status"] not in overall:
+            continue
+        group = groups.setdefault((row["student_id"], row["course_id"]), _empty_counts())
+        group[row["status"]] += row["total"]
+        overall[row["status"]] += row["total"]
+    
+    breakdown = [
+        StudentCourseAttendanceStats(student_id=student_id, course_id=course_id, **_with_rate(counts))
+        for (student_id, course_id), counts in groups.items()
+    ]
+    return AttendanceCounts(**_with_rate(overall)), breakdown
+
+async def _attendance_stats(
+    student_id: Optional[str],
+    course_id: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime]
+) -> AttendanceStats:
+    """Aggregate attendance counts in the database"""
+    params = {
+        "p_student_id": student_id,
+        "p_course_id": course_id,
+        "p_date_from": date_from.isoformat() if date_from else None,
+        "p_date_to": date_to.isoformat() if date_to else None
+    }
+    response = await execute(rpc(
+        "attendance_status_counts",
+        {key: value for key, value in params.items() if value is not None}
+    ))
+    overall, breakdown = _build_stats(response.data)
+    
+    return AttendanceStats(
+        student_id=student_id,
+        course_id=course_id,
+        date_from=date_from,
+        date_to=date_to,
+        overall=overall,
+        breakdown=breakdown
+    )
+
 @router.post("/", response_model=Attendance, status_code=status.HTTP_201_CREATED)
 async def mark_attendance(
     attendance: AttendanceCreate,
@@ -14,13 +88,135 @@ async def mark_attendance(
 ):
     """Mark attendance for a student (Teacher/Admin only)"""
     try:
-        attendance_data = attendance.model_dump()
+        attendance_data = attendance.model_dump(mode="json")
         attendance_data["marked_by"] = current_user.id
         
-        response = supabase.table("attendance").insert(attendance_data).execute()
+        response = await execute(table("attendance").insert(attendance_data))
         
         return Attendance(**response.data[0])
     
+    except HTTPException:
+        raise
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Attendance already marked for this student, course and date"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/bulk", response_model=AttendanceBulkResponse)
+async def mark_attendance_bulk(
+    session: AttendanceBulkCreate,
+    current_user: User = Depends(get_current_teacher_user)
+):
+    """Mark attendance for a whole class session in one write (Teacher/Admin only)
+    
+    Idempotent on (student_id, course_id, date): re-submitting a session
+    updates the existing records instead of duplicating them. Records for
+    ids that aren't students are reported as errors and the rest written.
+    """
+    if not session.records:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No attendance records provided"
+        )
+    if len(session.records) > settings.ATTENDANCE_BULK_MAX_RECORDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.ATTENDANCE_BULK_MAX_RECORDS} records per request"
+        )
+    
+    student_ids = [record.student_id for record in session.records]
+    if len(set(student_ids)) != len(student_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each student may appear only once per session"
+        )
+    
+    try:
+        if not is_uuid(session.course_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+        
+        date = session.date.isoformat()
+        results = dict.fromkeys(student_ids)
+        lookup_ids = [student_id for student_id in student_ids if is_uuid(student_id)]
+        
+        # Checked up front so one bad id doesn't fail the whole session on a
+        # foreign key violation. `existing` only tells created from updated;
+        # attendance_summary is kept in step by a trigger on attendance.
+        course, students, existing = await asyncio.gather(
+            execute(table("courses").select("id").eq("id", session.course_id)),
+            execute(table("users").select("id", "role").in_("id", lookup_ids)),
+            execute(
+                table("attendance")
+                .select("student_id")
+                .eq("course_id", session.course_id)
+                .eq("date", date)
+                .in_("student_id", lookup_ids)
+            )
+        )
+        if not course.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+        
+        roles = {row["id"]: row["role"] for row in students.data}
+        for student_id in student_ids:
+            if student_id not in roles:
+                error = "Student not found"
+            elif roles[student_id] != UserRole.STUDENT.value:
+                error = "User is not a student"
+            else:
+                continue
+            results[student_id] = AttendanceBulkResult(student_id=student_id, result="error", error=error)
+        
+        rows = [{
+            "student_id": record.student_id,
+            "course_id": session.course_id,
+            "date": date,
+            "status": record.status.value,
+            "notes": record.notes,
+            "marked_by": current_user.id
+        } for record in session.records if results[record.student_id] is None]
+        already_marked = {row["student_id"] for row in existing.data}
+        
+        if rows:
+            response = await execute(
+                table("attendance").upsert(rows, on_conflict="student_id,course_id,date")
+            )
+            for row in response.data:
+                student_id = row["student_id"]
+                results[student_id] = AttendanceBulkResult(
+                    student_id=student_id,
+                    result="updated" if student_id in already_marked else "created",
+                    attendance=Attendance(**row)
+                )
+        
+        ordered = list(results.values())
+        return AttendanceBulkResponse(
+            course_id=session.course_id,
+            date=session.date,
+            created=sum(1 for r in ordered if r.result == "created"),
+            updated=sum(1 for r in ordered if r.result == "updated"),
+            failed=sum(1 for r in ordered if r.result == "error"),
+            results=ordered
+        )
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -30,13 +226,39 @@ async def mark_attendance(
 @router.get("/course/{course_id}", response_model=List[Attendance])
 async def get_course_attendance(
     course_id: str,
+    response: Response,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user)
 ):
     """Get all attendance records for a course"""
     try:
-        response = supabase.table("attendance").select("*").eq("course_id", course_id).execute()
-        return [Attendance(**record) for record in response.data]
+        query = table("attendance").select(select_columns(Attendance, page, "date")).eq("course_id", course_id)
+        result = await execute(paginate(query, page, "date", desc=True))
+        return page_response(result.data, page, Attendance, "date", response)
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/course/{course_id}/export")
+async def export_course_attendance(
+    course_id: str,
+    params: ExportParams = Depends(),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all attendance records for a course as NDJSON or CSV"""
+    try:
+        return await export_response(
+            lambda select: table("attendance").select(select).eq("course_id", course_id),
+            Attendance, params, "date", f"attendance-{course_id}", desc=True
+        )
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -46,13 +268,18 @@ async def get_course_attendance(
 @router.get("/student/{student_id}", response_model=List[Attendance])
 async def get_student_attendance(
     student_id: str,
+    response: Response,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user)
 ):
     """Get all attendance records for a student"""
     try:
-        response = supabase.table("attendance").select("*").eq("student_id", student_id).execute()
-        return [Attendance(**record) for record in response.data]
+        query = table("attendance").select(select_columns(Attendance, page, "date")).eq("student_id", student_id)
+        result = await execute(paginate(query, page, "date", desc=True))
+        return page_response(result.data, page, Attendance, "date", response)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -63,13 +290,111 @@ async def get_student_attendance(
 async def get_student_course_attendance(
     student_id: str,
     course_id: str,
+    response: Response,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user)
 ):
     """Get attendance records for a student in a specific course"""
     try:
-        response = supabase.table("attendance").select("*").eq("student_id", student_id).eq("course_id", course_id).execute()
-        return [Attendance(**record) for record in response.data]
+        query = table("attendance").select(select_columns(Attendance, page, "date")).eq("student_id", student_id).eq("course_id", course_id)
+        result = await execute(paginate(query, page, "date", desc=True))
+        return page_response(result.data, page, Attendance, "date", response)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/stats/student/{student_id}", response_model=AttendanceStats)
+async def get_student_attendance_stats(
+    student_id: str,
+    course_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Get attendance counts and rates for a student, per course"""
+    try:
+        return await _attendance_stats(student_id, course_id, date_from, date_to)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/stats/course/{course_id}", response_model=AttendanceStats)
+async def get_course_attendance_stats(
+    course_id: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Get attendance counts and rates for a course, per student"""
+    try:
+        return await _attendance_stats(None, course_id, date_from, date_to)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/summary/student/{student_id}", response_model=List[StudentCourseAttendanceStats])
+async def get_student_attendance_summary(
+    student_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get precomputed all-time attendance counters for a student, per course"""
+    try:
+        response = await execute(table("attendance_summary").select("*").eq("student_id", student_id))
+        return [StudentCourseAttendanceStats(**_with_rate(row)) for row in response.data]
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/summary/course/{course_id}", response_model=List[StudentCourseAttendanceStats])
+async def get_course_attendance_summary(
+    course_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get precomputed all-time attendance counters for a course, per student"""
+    try:
+        response = await execute(table("attendance_summary").select("*").eq("course_id", course_id))
+        return [StudentCourseAttendanceStats(**_with_rate(row)) for row in response.data]
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/summary/rebuild")
+async def rebuild_attendance_summary(current_user: User = Depends(get_current_admin_user)):
+    """Recompute attendance summary counters from raw records (Admin only)"""
+    try:
+        response = await execute(
+            rpc("rebuild_attendance_summary"),
+            timeout=settings.ATTENDANCE_SUMMARY_REBUILD_TIMEOUT_SECONDS
+        )
+        return {"message": "Attendance summary rebuilt", "pairs": response.data}
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -86,7 +411,7 @@ async def update_attendance(
     try:
         update_data = attendance_update.model_dump(exclude_unset=True)
         
-        response = supabase.table("attendance").update(update_data).eq("id", attendance_id).execute()
+        response = await execute(table("attendance").update(update_data).eq("id", attendance_id))
         
         if not response.data:
             raise HTTPException(
@@ -111,7 +436,7 @@ async def delete_attendance(
 ):
     """Delete attendance record (Teacher/Admin only)"""
     try:
-        response = supabase.table("attendance").delete().eq("id", attendance_id).execute()
+        response = await execute(table("attendance").delete().eq("id", attendance_id))
         
         if not response.data:
             raise HTTPException(
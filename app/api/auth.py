@@ -1,18 +1,36 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from datetime import timedelta
-from app.models.schemas import UserLogin, UserRegister, Token, UserRole
-from app.core.security import verify_password, get_password_hash, create_access_token
-from app.core.supabase import supabase, supabase_admin
+from typing import Optional
+from app.models.schemas import UserLogin, UserRegister, Token, UserRole, RefreshRequest
+from app.core.security import (
+    verify_password, get_password_hash, create_access_token, revoke_access_token,
+    create_refresh_token, decode_refresh_token
+)
+from app.core.refresh_tokens import REVOKED, family_store
+from app.core.supabase import supabase_pool
+from app.core.database import table, execute, auth_call
+from app.core.loader import Loaders
 from app.core.config import settings
+from app.api.dependencies import optional_security
 
 router = APIRouter()
 
+def _refresh_ttl() -> int:
+    return settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+
+async def start_refresh_family(user_id: str, role: str) -> str:
+    """Issue the first refresh token of a new family"""
+    refresh_token, claims = create_refresh_token(user_id, role)
+    await family_store.start(claims["fam"], claims["jti"], _refresh_ttl())
+    return refresh_token
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserRegister):
     """Register a new user"""
     try:
         # Check if user already exists
-        existing = supabase.table("users").select("*").eq("email", user_data.email).execute()
+        existing = await execute(table("users").select("*").eq("email", user_data.email))
         if existing.data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -20,7 +38,7 @@ async def register(user_data: UserRegister):
             )
         
         # Create user in Supabase Auth
-        auth_response = supabase_admin.auth.admin.create_user({
+        auth_response = await auth_call(supabase_pool.admin_auth.admin.create_user, {
             "email": user_data.email,
             "password": user_data.password,
             "email_confirm": True
@@ -36,17 +54,19 @@ async def register(user_data: UserRegister):
             "created_at": "now()"
         }
         
-        profile_response = supabase.table("users").insert(user_profile).execute()
+        profile_response = await execute(table("users").insert(user_profile))
         
         # Create access token
         access_token = create_access_token(
             data={"sub": auth_response.user.id, "role": user_data.role.value},
             expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
+        refresh_token = await start_refresh_family(auth_response.user.id, user_data.role.value)
         
         return {
             "access_token": access_token,
             "token_type": "bearer",
+            "refresh_token": refresh_token,
             "user": profile_response.data[0]
         }
     
@@ -62,8 +82,9 @@ async def register(user_data: UserRegister):
 async def login(user_credentials: UserLogin):
     """Login user and return access token"""
     try:
-        # Sign in with Supabase Auth
-        auth_response = supabase.auth.sign_in_with_password({
+        # Sign in with Supabase Auth on a client scoped to this request
+        auth_client = supabase_pool.auth_client()
+        auth_response = await auth_call(auth_client.sign_in_with_password, {
             "email": user_credentials.email,
             "password": user_credentials.password
         })
@@ -75,7 +96,7 @@ async def login(user_credentials: UserLogin):
             )
         
         # Get user profile
-        profile_response = supabase.table("users").select("*").eq("id", auth_response.user.id).execute()
+        profile_response = await execute(table("users").select("*").eq("id", auth_response.user.id))
         
         if not profile_response.data:
             raise HTTPException(
@@ -90,10 +111,12 @@ async def login(user_credentials: UserLogin):
             data={"sub": auth_response.user.id, "role": user_profile["role"]},
             expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
+        refresh_token = await start_refresh_family(auth_response.user.id, user_profile["role"])
         
         return {
             "access_token": access_token,
             "token_type": "bearer",
+            "refresh_token": refresh_token,
             "user": user_profile
         }
     
@@ -105,11 +128,84 @@ async def login(user_credentials: UserLogin):
             detail="Incorrect email or password"
         )
 
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, loaders: Loaders = Depends()):
+    """Exchange a refresh token for a new access token and refresh token
+    
+    Both tokens carry the user's current role, so role changes apply from
+    the next refresh; a user that no longer exists can't refresh.
+    """
+    payload = decode_refresh_token(request.refresh_token)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    
+    user_id, family = payload["sub"], payload["fam"]
+    try:
+        user = await loaders.users.load(user_id)
+        if user is None:
+            await family_store.revoke(family, _refresh_ttl())
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User no longer exists"
+            )
+        role = user["role"]
+        
+        refresh_token, claims = create_refresh_token(user_id, role, family, payload["fst"])
+        previous = await family_store.rotate(family, claims["jti"], _refresh_ttl())
+        
+        if previous is None:
+            # The store has no record of the family (expired, evicted or lost
+            # in a restart), so it can't tell a rotated-out or logged-out token
+            # from a current one: fail closed and make the client log in again
+            await family_store.revoke(family, _refresh_ttl())
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token is no longer valid, please log in again"
+            )
+        if previous != payload["jti"]:
+            # A rotated-out token was presented again: assume it leaked and
+            # revoke the whole family, including the legitimate latest token
+            await family_store.revoke(family, _refresh_ttl())
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked" if previous == REVOKED else "Refresh token reuse detected"
+            )
+        
+        access_token = create_access_token(
+            data={"sub": user_id, "role": role},
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "refresh_token": refresh_token
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
 @router.post("/logout")
-async def logout():
-    """Logout user"""
+async def logout(
+    request: Optional[RefreshRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Logout user, revoking the bearer token and the refresh token family if given"""
     try:
-        supabase.auth.sign_out()
+        if credentials is not None:
+            revoke_access_token(credentials.credentials)
+        if request is not None:
+            payload = decode_refresh_token(request.refresh_token)
+            if payload is not None:
+                await family_store.revoke(payload["fam"], _refresh_ttl())
         return {"message": "Successfully logged out"}
     except Exception as e:
         raise HTTPException(
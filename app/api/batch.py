@@ -0,0 +1,34 @@
+from typing import Type
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from app.core.config import settings
+from app.core.database import canonical_uuid
+from app.core.loader import Loader
+from app.models.schemas import BatchRequest
+from app.api.serialization import FastJSONResponse, trusted_rows
+
+async def batch_response(batch: BatchRequest, loader: Loader, model: Type[BaseModel]):
+    """Resolve the ids of a batch request with one query
+
+    Items come back in request order, each id once (in any case); ids that
+    don't exist or aren't UUIDs are listed under `missing`.
+    """
+    ids = list(dict.fromkeys(canonical_uuid(key) or key for key in batch.ids))
+    if not ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No ids provided"
+        )
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_MAX_IDS} ids per request"
+        )
+
+    rows = await loader.load_many(ids)
+    found = [row for row in rows if row is not None]
+    missing = [key for key, row in zip(ids, rows) if row is None]
+
+    if settings.FAST_SERIALIZATION:
+        return FastJSONResponse(content={"items": trusted_rows(found, model), "missing": missing})
+    return {"items": [model(**row) for row in found], "missing": missing}
@@ -0,0 +1,73 @@
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from app.core.database import table, execute
+from app.api.pagination import PageParams, encode_cursor, decode_cursor, paginate
+
+def _is_position(position) -> bool:
+    """Whether a cursor part is empty or a (change_seq, id) keyset"""
+    return position is None or (
+        isinstance(position, list) and len(position) == 2 and isinstance(position[0], int)
+    )
+
+def _after(position: Optional[list], limit: int) -> PageParams:
+    return PageParams(
+        limit=limit,
+        cursor=encode_cursor(position) if position else None,
+        fields=None,
+        compact=False,
+        x_compact=None
+    )
+
+async def fetch_changes(
+    table_name: str,
+    since: Optional[str],
+    limit: int
+) -> Tuple[List[dict], List[str], str, bool]:
+    """Fetch rows changed and ids deleted after a changes cursor
+    
+    Rows and tombstones are read in (change_seq, id) order through the
+    <table>_changes and deleted_records_changes views, which hold back writes
+    that could still commit behind the cursor (see the change_seq migration).
+    The cursor combines the keyset of the last changed row with that of the
+    last tombstone. Returns the changed rows, the deleted ids, the next
+    cursor and whether more remain.
+    """
+    if since:
+        position, tombstone = decode_cursor(since)
+        if not _is_position(position) or not _is_position(tombstone):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    else:
+        # A first sync downloads every row, so earlier deletions are irrelevant
+        latest = await execute(
+            table("deleted_records_changes")
+            .select("id,change_seq")
+            .eq("table_name", table_name)
+            .order("change_seq.desc,id", desc=True)
+            .limit(1)
+        )
+        position = None
+        tombstone = [latest.data[0]["change_seq"], latest.data[0]["id"]] if latest.data else None
+    
+    changed = await execute(
+        paginate(table(f"{table_name}_changes").select("*"), _after(position, limit), "change_seq")
+    )
+    tombstones = await execute(paginate(
+        table("deleted_records_changes").select("id,record_id,change_seq").eq("table_name", table_name),
+        _after(tombstone, limit),
+        "change_seq"
+    ))
+    
+    rows = changed.data[:limit]
+    deleted = tombstones.data[:limit]
+    has_more = len(changed.data) > limit or len(tombstones.data) > limit
+    
+    if rows:
+        position = [rows[-1]["change_seq"], rows[-1]["id"]]
+    if deleted:
+        tombstone = [deleted[-1]["change_seq"], deleted[-1]["id"]]
+    
+    cursor = encode_cursor([position, tombstone])
+    return rows, [t["record_id"] for t in deleted], cursor, has_more
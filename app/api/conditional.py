@@ -0,0 +1,90 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional
+from fastapi import Request, Response, status
+
+def compute_etag(rows: List[dict], variant: str = "") -> str:
+    """Weak ETag over row ids and modification times
+    
+    Rows without an updated_at column (e.g. projected with fields=) are
+    hashed by content instead. `variant` tells apart representations of the
+    same rows, such as compact output.
+    """
+    digest = hashlib.sha1(variant.encode())
+    for row in rows:
+        if row.get("updated_at") is not None:
+            part = f"{row.get('id')}@{row['updated_at']}"
+        else:
+            part = json.dumps(row, sort_keys=True, default=str)
+        digest.update(part.encode())
+        digest.update(b"\n")
+    return f'W/"{digest.hexdigest()}"'
+
+def _last_modified(row: dict) -> Optional[datetime]:
+    stamp = row.get("updated_at") or row.get("created_at")
+    if not stamp:
+        return None
+    try:
+        modified = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have second precision
+    return modified.astimezone(timezone.utc).replace(microsecond=0)
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    return _strip_weak(etag) in {_strip_weak(tag) for tag in header.split(",")}
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    rows: List[dict],
+    single: bool = False,
+    compact: Optional[bool] = None
+) -> Optional[Response]:
+    """Set validators on the response and return a 304 if the client is current
+    
+    Last-Modified is only sent for single items: a deleted list row does not
+    move the newest timestamp, so lists are validated by ETag alone. Pass
+    `compact` for lists that honour X-Compact, so the full and compact
+    bodies get different ETags.
+    """
+    headers = {
+        "ETag": compute_etag(rows, "compact" if compact else ""),
+        "Cache-Control": "private, no-cache"
+    }
+    if compact is not None:
+        headers["Vary"] = "X-Compact"
+    
+    modified = _last_modified(rows[0]) if single and rows else None
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    
+    response.headers.update(headers)
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return None
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if since.tzinfo is not None and modified <= since:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return None
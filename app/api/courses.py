@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
 from typing import List
-from app.models.schemas import Course, CourseCreate, CourseUpdate, User, EnrollmentCreate
-from app.core.supabase import supabase
+from app.models.schemas import BatchRequest, Course, CourseBatch, CourseCreate, CourseUpdate, User, EnrollmentCreate
+from app.core.database import table, execute
+from app.core.enrollment_index import enrollment_index
+from app.core.loader import Loaders
+from app.core.response_cache import response_cache, cache_key
 from app.api.dependencies import get_current_user, get_current_teacher_user
+from app.api.pagination import PageParams, select_columns, paginate, page_response
+from app.api.conditional import conditional_response
+from app.api.batch import batch_response
 
 router = APIRouter()
 
@@ -14,10 +20,13 @@ async def create_course(
     """Create a new course (Teacher/Admin only)"""
     try:
         course_data = course.model_dump()
-        response = supabase.table("courses").insert(course_data).execute()
+        response = await execute(table("courses").insert(course_data))
+        await response_cache.invalidate("courses")
         
         return Course(**response.data[0])
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -25,12 +34,47 @@ async def create_course(
         )
 
 @router.get("/", response_model=List[Course])
-async def get_all_courses(current_user: User = Depends(get_current_user)):
+async def get_all_courses(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: User = Depends(get_current_user)
+):
     """Get all courses"""
     try:
-        response = supabase.table("courses").select("*").execute()
-        return [Course(**course) for course in response.data]
+        query = table("courses").select(select_columns(Course, page, "created_at"))
+        rows = await response_cache.fetch(
+            cache_key("courses:list", current_user.role, request.query_params.multi_items()),
+            ["courses"],
+            paginate(query, page, "created_at")
+        )
+        
+        not_modified = conditional_response(request, response, rows, compact=page.compact)
+        if not_modified is not None:
+            return not_modified
+        
+        return page_response(rows, page, Course, "created_at", response)
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/batch", response_model=CourseBatch)
+async def get_courses_batch(
+    batch: BatchRequest,
+    loaders: Loaders = Depends(),
+    current_user: User = Depends(get_current_user)
+):
+    """Get up to BATCH_MAX_IDS courses by ID in one request"""
+    try:
+        return await batch_response(batch, loaders.courses, Course)
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -40,19 +84,29 @@ async def get_all_courses(current_user: User = Depends(get_current_user)):
 @router.get("/{course_id}", response_model=Course)
 async def get_course(
     course_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get course by ID"""
     try:
-        response = supabase.table("courses").select("*").eq("id", course_id).execute()
+        rows = await response_cache.fetch(
+            cache_key(f"courses:item:{course_id}", current_user.role),
+            ["courses"],
+            table("courses").select("*").eq("id", course_id)
+        )
         
-        if not response.data:
+        if not rows:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Course not found"
             )
         
-        return Course(**response.data[0])
+        not_modified = conditional_response(request, response, rows, single=True)
+        if not_modified is not None:
+            return not_modified
+        
+        return Course(**rows[0])
     
     except HTTPException:
         raise
@@ -72,7 +126,8 @@ async def update_course(
     try:
         update_data = course_update.model_dump(exclude_unset=True)
         
-        response = supabase.table("courses").update(update_data).eq("id", course_id).execute()
+        response = await execute(table("courses").update(update_data).eq("id", course_id))
+        await response_cache.invalidate("courses")
         
         if not response.data:
             raise HTTPException(
@@ -97,7 +152,8 @@ async def delete_course(
 ):
     """Delete course (Teacher/Admin only)"""
     try:
-        response = supabase.table("courses").delete().eq("id", course_id).execute()
+        response = await execute(table("courses").delete().eq("id", course_id))
+        await response_cache.invalidate("courses", "enrollments")
         
         if not response.data:
             raise HTTPException(
@@ -105,6 +161,9 @@ async def delete_course(
                 detail="Course not found"
             )
         
+        # Student entries may still list the deleted course
+        enrollment_index.clear()
+        
         return None
     
     except HTTPException:
@@ -121,18 +180,29 @@ async def enroll_student(
     current_user: User = Depends(get_current_user)
 ):
     """Enroll a student in a course"""
+    already_enrolled = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Student already enrolled in this course"
+    )
+    
+    if enrollment_index.is_enrolled(enrollment.student_id, enrollment.course_id):
+        raise already_enrolled
+    
     try:
-        # Check if already enrolled
-        existing = supabase.table("enrollments").select("*").eq("student_id", enrollment.student_id).eq("course_id", enrollment.course_id).execute()
-        
-        if existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Student already enrolled in this course"
+        # Duplicates are skipped by the unique index, returning no rows
+        enrollment_data = enrollment.model_dump()
+        response = await execute(
+            table("enrollments").upsert(
+                enrollment_data,
+                on_conflict="student_id,course_id",
+                ignore_duplicates=True
             )
+        )
+        enrollment_index.invalidate(enrollment.student_id, enrollment.course_id)
+        await response_cache.invalidate("enrollments")
         
-        enrollment_data = enrollment.model_dump()
-        response = supabase.table("enrollments").insert(enrollment_data).execute()
+        if not response.data:
+            raise already_enrolled
         
         return {"message": "Successfully enrolled", "data": response.data[0]}
     
@@ -147,23 +217,63 @@ async def enroll_student(
 @router.get("/student/{student_id}", response_model=List[Course])
 async def get_student_courses(
     student_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get all courses for a student"""
     try:
-        # Get enrollments
-        enrollments = supabase.table("enrollments").select("course_id").eq("student_id", student_id).execute()
+        # Embed the courses in the enrollment query to resolve them in one call
+        rows = await response_cache.fetch(
+            cache_key(f"courses:student:{student_id}", current_user.role),
+            ["courses", "enrollments"],
+            table("enrollments").select("courses(*)").eq("student_id", student_id)
+        )
+        courses = [row["courses"] for row in rows if row["courses"]]
+        
+        enrollment_index.set_courses(student_id, (course["id"] for course in courses))
+        
+        not_modified = conditional_response(request, response, courses)
+        if not_modified is not None:
+            return not_modified
         
-        if not enrollments.data:
-            return []
+        return [Course(**course) for course in courses]
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/{course_id}/students", response_model=List[User])
+async def get_course_students(
+    course_id: str,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """Get all students enrolled in a course"""
+    try:
+        # Embed users through the enrollments.student_id foreign key
+        rows = await response_cache.fetch(
+            cache_key(f"courses:roster:{course_id}", current_user.role),
+            ["enrollments", "users"],
+            table("enrollments").select("users!student_id(*)").eq("course_id", course_id)
+        )
+        students = [row["users"] for row in rows if row["users"]]
         
-        course_ids = [e["course_id"] for e in enrollments.data]
+        enrollment_index.set_students(course_id, (student["id"] for student in students))
         
-        # Get courses
-        response = supabase.table("courses").select("*").in_("id", course_ids).execute()
+        not_modified = conditional_response(request, response, students)
+        if not_modified is not None:
+            return not_modified
         
-        return [Course(**course) for course in response.data]
+        return [User(**student) for student in students]
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,50 +1,94 @@
+from typing import Union
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import timed
 from app.core.security import decode_access_token
-from app.core.supabase import supabase
-from app.models.schemas import User
+from app.core.loader import Loaders
+from app.models.schemas import User, Principal
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-async def get_current_user(
+# Users resolved by get_current_user, keyed by user id
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+def invalidate_principal(user_id: str) -> None:
+    """Drop a cached user so the next request reloads it"""
+    principal_cache.pop(user_id)
+
+async def get_token_payload(
     credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> User:
-    """Get current authenticated user from JWT token"""
+) -> dict:
+    """Decode and validate the bearer token"""
     token = credentials.credentials
-    payload = decode_access_token(token)
-    
+    with timed("jwt"):
+        payload = decode_access_token(token)
+
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user_id = payload.get("sub")
-    if user_id is None:
+
+    if payload.get("sub") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    
+
+    return payload
+
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    loaders: Loaders = Depends()
+) -> User:
+    """Get current authenticated user from JWT token"""
+    user_id = payload["sub"]
+
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return cached
+
     # Get user from Supabase
     try:
-        response = supabase.table("users").select("*").eq("id", user_id).execute()
-        if not response.data:
+        with timed("principal"):
+            # Shares the request's loader, so handlers looking up the caller don't query again
+            row = await loaders.users.load(user_id)
+        if row is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        return User(**response.data[0])
+        user = User(**row)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+    principal_cache.set(user_id, user)
+    return user
+
+async def get_current_principal(
+    payload: dict = Depends(get_token_payload),
+    loaders: Loaders = Depends()
+) -> Union[User, Principal]:
+    """Get the caller's identity, from token claims when AUTH_CLAIMS_ONLY is set"""
+    if settings.AUTH_CLAIMS_ONLY and payload.get("role"):
+        return Principal(id=payload["sub"], role=payload["role"])
+    return await get_current_user(payload, loaders)
+
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Union[User, Principal] = Depends(get_current_principal)
+) -> Union[User, Principal]:
     """Verify that current user is an admin"""
     if current_user.role != "admin":
         raise HTTPException(
@@ -54,8 +98,8 @@ async def get_current_admin_user(
     return current_user
 
 async def get_current_teacher_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Union[User, Principal] = Depends(get_current_principal)
+) -> Union[User, Principal]:
     """Verify that current user is a teacher or admin"""
     if current_user.role not in ["teacher", "admin"]:
         raise HTTPException(
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
-from app.models.schemas import Event, EventCreate, EventUpdate, User
-from app.core.supabase import supabase
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from typing import List, Optional
+from app.models.schemas import BatchRequest, Event, EventBatch, EventCreate, EventUpdate, EventChanges, User
+from app.core.config import settings
+from app.core.database import table, execute
+from app.core.loader import Loaders
+from app.core.response_cache import response_cache, cache_key
+from app.core.pubsub import hub
 from app.api.dependencies import get_current_user, get_current_teacher_user
+from app.api.pagination import PageParams, select_columns, paginate, page_response
+from app.api.conditional import conditional_response
+from app.api.changes import fetch_changes
+from app.api.batch import batch_response
 
 router = APIRouter()
 
@@ -14,10 +22,14 @@ async def create_event(
     """Create a new event (Teacher/Admin only)"""
     try:
         event_data = event.model_dump()
-        response = supabase.table("events").insert(event_data).execute()
+        response = await execute(table("events").insert(event_data))
+        await response_cache.invalidate("events")
+        hub.publish("events", "created", response.data[0])
         
         return Event(**response.data[0])
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -25,12 +37,71 @@ async def create_event(
         )
 
 @router.get("/", response_model=List[Event])
-async def get_all_events(current_user: User = Depends(get_current_user)):
+async def get_all_events(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: User = Depends(get_current_user)
+):
     """Get all events"""
     try:
-        response = supabase.table("events").select("*").order("event_date").execute()
-        return [Event(**event) for event in response.data]
+        query = table("events").select(select_columns(Event, page, "event_date"))
+        rows = await response_cache.fetch(
+            cache_key("events:list", current_user.role, request.query_params.multi_items()),
+            ["events"],
+            paginate(query, page, "event_date")
+        )
+        
+        not_modified = conditional_response(request, response, rows, compact=page.compact)
+        if not_modified is not None:
+            return not_modified
+        
+        return page_response(rows, page, Event, "event_date", response)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/changes", response_model=EventChanges)
+async def get_event_changes(
+    since: Optional[str] = Query(None, description="Cursor from the previous sync; omit for a full sync"),
+    limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT),
+    current_user: User = Depends(get_current_user)
+):
+    """Get events created, updated or deleted since a sync cursor"""
+    try:
+        rows, deleted, cursor, has_more = await fetch_changes("events", since, limit)
+        return EventChanges(
+            changed=[Event(**row) for row in rows],
+            deleted=deleted,
+            cursor=cursor,
+            has_more=has_more
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/batch", response_model=EventBatch)
+async def get_events_batch(
+    batch: BatchRequest,
+    loaders: Loaders = Depends(),
+    current_user: User = Depends(get_current_user)
+):
+    """Get up to BATCH_MAX_IDS events by ID in one request"""
+    try:
+        return await batch_response(batch, loaders.events, Event)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -40,19 +111,29 @@ async def get_all_events(current_user: User = Depends(get_current_user)):
 @router.get("/{event_id}", response_model=Event)
 async def get_event(
     event_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get event by ID"""
     try:
-        response = supabase.table("events").select("*").eq("id", event_id).execute()
+        rows = await response_cache.fetch(
+            cache_key(f"events:item:{event_id}", current_user.role),
+            ["events"],
+            table("events").select("*").eq("id", event_id)
+        )
         
-        if not response.data:
+        if not rows:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Event not found"
             )
         
-        return Event(**response.data[0])
+        not_modified = conditional_response(request, response, rows, single=True)
+        if not_modified is not None:
+            return not_modified
+        
+        return Event(**rows[0])
     
     except HTTPException:
         raise
@@ -72,7 +153,8 @@ async def update_event(
     try:
         update_data = event_update.model_dump(exclude_unset=True)
         
-        response = supabase.table("events").update(update_data).eq("id", event_id).execute()
+        response = await execute(table("events").update(update_data).eq("id", event_id))
+        await response_cache.invalidate("events")
         
         if not response.data:
             raise HTTPException(
@@ -80,6 +162,8 @@ async def update_event(
                 detail="Event not found"
             )
         
+        hub.publish("events", "updated", response.data[0])
+        
         return Event(**response.data[0])
     
     except HTTPException:
@@ -97,7 +181,8 @@ async def delete_event(
 ):
     """Delete event (Teacher/Admin only)"""
     try:
-        response = supabase.table("events").delete().eq("id", event_id).execute()
+        response = await execute(table("events").delete().eq("id", event_id))
+        await response_cache.invalidate("events")
         
         if not response.data:
             raise HTTPException(
@@ -105,6 +190,8 @@ async def delete_event(
                 detail="Event not found"
             )
         
+        hub.publish("events", "deleted", response.data[0])
+        
         return None
     
     except HTTPException:
@@ -0,0 +1,118 @@
+import csv
+import io
+import zlib
+from enum import Enum
+from typing import AsyncIterator, Callable, List, Optional, Type
+import orjson
+from fastapi import HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.core.config import settings
+from app.core.database import execute
+from app.api.pagination import PageParams, encode_cursor, paginate
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+MEDIA_TYPES = {ExportFormat.NDJSON: "application/x-ndjson", ExportFormat.CSV: "text/csv"}
+
+class ExportParams:
+    """Query parameters shared by every export endpoint"""
+
+    def __init__(
+        self,
+        format: ExportFormat = Query(ExportFormat.NDJSON),
+        gzip: bool = Query(False, description="Compress the file with gzip"),
+        fields: Optional[str] = Query(None, description="Comma-separated list of fields to export"),
+    ):
+        self.format = format
+        self.gzip = gzip
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else []
+
+def export_columns(model: Type[BaseModel], params: ExportParams) -> List[str]:
+    """Columns to export, in model order unless fields are given"""
+    if not params.fields:
+        return list(model.model_fields)
+    unknown = [f for f in params.fields if f not in model.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return list(dict.fromkeys(params.fields))
+
+async def _pages(make_query: Callable, columns: List[str], sort_key: str, desc: bool) -> AsyncIterator[List[dict]]:
+    """Walk a table with keyset pagination, one batch of rows at a time"""
+    select = ",".join(dict.fromkeys(columns + [sort_key, "id"]))
+    cursor = None
+    while True:
+        page = PageParams(
+            limit=settings.EXPORT_BATCH_SIZE, cursor=cursor, fields=None, compact=False, x_compact=None
+        )
+        result = await execute(paginate(make_query(select), page, sort_key, desc))
+        rows = result.data
+        has_more = len(rows) > page.limit
+        rows = rows[:page.limit]
+        if rows:
+            yield rows
+        if not has_more:
+            return
+        cursor = encode_cursor([rows[-1][sort_key], rows[-1]["id"]])
+
+def _encode(rows: List[dict], columns: List[str], format: ExportFormat, header: bool) -> bytes:
+    if format == ExportFormat.NDJSON:
+        return b"".join(orjson.dumps({c: row.get(c) for c in columns}) + b"\n" for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows([["" if row.get(c) is None else row.get(c) for c in columns] for row in rows])
+    return buffer.getvalue().encode()
+
+async def export_response(
+    make_query: Callable,
+    model: Type[BaseModel],
+    params: ExportParams,
+    sort_key: str,
+    filename: str,
+    desc: bool = False
+) -> StreamingResponse:
+    """Stream every row of a query as NDJSON or CSV
+
+    make_query(select) must return a fresh select query builder; it is
+    called once per batch of EXPORT_BATCH_SIZE rows. The first batch is
+    fetched before responding so errors still produce a proper status code.
+    """
+    columns = export_columns(model, params)
+    pages = _pages(make_query, columns, sort_key, desc)
+    try:
+        first = await pages.__anext__()
+    except StopAsyncIteration:
+        first = []
+
+    async def body():
+        # wbits=31 writes a gzip container rather than a raw zlib stream
+        compressor = zlib.compressobj(wbits=31) if params.gzip else None
+        batch, header = first, True
+        while True:
+            chunk = _encode(batch, columns, params.format, header)
+            header = False
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+            try:
+                batch = await pages.__anext__()
+            except StopAsyncIteration:
+                break
+        if compressor:
+            yield compressor.flush()
+
+    extension = params.format.value + (".gz" if params.gzip else "")
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if params.gzip else MEDIA_TYPES[params.format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
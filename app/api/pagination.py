@@ -0,0 +1,127 @@
+import base64
+import json
+from typing import List, Optional, Type
+from fastapi import Header, HTTPException, Query, Response, status
+from pydantic import BaseModel
+from app.core.config import settings
+from app.core.metrics import timed
+from app.api.serialization import FastJSONResponse, compact_rows, json_timestamps, trusted_rows
+
+class PageParams:
+    """Query parameters shared by every paginated list endpoint"""
+
+    def __init__(
+        self,
+        limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT),
+        cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+        fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+        compact: bool = Query(False, description="Omit optional fields that are null"),
+        x_compact: Optional[str] = Header(None, include_in_schema=False),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else []
+        # Mobile clients can opt in once with `X-Compact: 1` instead of per URL
+        self.compact = compact or x_compact == "1"
+
+def encode_cursor(values: list) -> str:
+    """Encode keyset values as an opaque cursor"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+# Characters with a meaning in PostgREST's or=(...) filter syntax
+FILTER_METACHARACTERS = frozenset('",()\\')
+
+def keyset_position(cursor: str) -> list:
+    """Decode a page cursor into (sort value, id), checking both are safe to put in a filter"""
+    values = decode_cursor(cursor)
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (str, int)) \
+                or (isinstance(value, str) and FILTER_METACHARACTERS.intersection(value)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    return values
+
+def select_columns(model: Type[BaseModel], page: PageParams, sort_key: str) -> str:
+    """Build the select clause for a page, always including the keyset columns"""
+    if not page.fields:
+        return "*"
+
+    unknown = [f for f in page.fields if f not in model.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+
+    columns = list(dict.fromkeys(page.fields))
+    for key in (sort_key, "id"):
+        if key not in columns:
+            columns.append(key)
+    return ",".join(columns)
+
+def paginate(query, page: PageParams, sort_key: str, desc: bool = False):
+    """Apply keyset filtering, ordering and the page limit to a select query"""
+    op = "lt" if desc else "gt"
+    if page.cursor:
+        value, last_id = keyset_position(page.cursor)
+        query = query.or_(
+            f'{sort_key}.{op}."{value}",'
+            f'and({sort_key}.eq."{value}",id.{op}."{last_id}")'
+        )
+
+    # order() takes one column, so the id tie-breaker is folded into its name
+    order = f"{sort_key}.desc,id" if desc else f"{sort_key},id"
+    # Fetch one extra row to know whether another page exists
+    return query.order(order, desc=desc).limit(page.limit + 1)
+
+def page_response(
+    rows: List[dict],
+    page: PageParams,
+    model: Type[BaseModel],
+    sort_key: str,
+    response: Response
+):
+    """Trim a fetched page and expose the next cursor in X-Next-Cursor"""
+    has_more = len(rows) > page.limit
+    rows = rows[:page.limit]
+
+    # X-Compact changes the body, so caches must key on it
+    headers = {"Vary": "X-Compact"}
+    if has_more:
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor([last[sort_key], last["id"]])
+
+    response.headers.update(headers)
+
+    # Projected and compact rows do not satisfy the full response model
+    if page.fields:
+        rows = json_timestamps(rows, model)
+        if page.compact:
+            rows = compact_rows(rows, model)
+        return FastJSONResponse(content=rows, headers=dict(response.headers))
+
+    with timed("build"):
+        if settings.FAST_SERIALIZATION or page.compact:
+            # Returning a Response skips FastAPI's second response_model pass
+            rows = trusted_rows(rows, model)
+            if page.compact:
+                rows = compact_rows(rows, model)
+            return FastJSONResponse(content=rows, headers=dict(response.headers))
+        return [model(**row) for row in rows]
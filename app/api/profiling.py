@@ -0,0 +1,150 @@
+import random
+import re
+import time
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qs
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from starlette.routing import Match
+from app.models.schemas import User
+from app.core.config import settings
+from app.core.loader import Loaders
+from app.core.security import decode_access_token
+from app.api.dependencies import get_current_principal, get_current_admin_user
+
+router = APIRouter()
+
+PROFILE_SUFFIX = ".speedscope.json"
+
+def _profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR)
+
+def _load_profiler():
+    """Import pyinstrument, an optional dependency needed only for profiling"""
+    try:
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import SpeedscopeRenderer
+    except ImportError:
+        return None
+    return Profiler, SpeedscopeRenderer
+
+async def _is_admin(scope) -> bool:
+    """Whether the request carries a token that passes get_current_admin_user"""
+    headers = dict(scope["headers"])
+    scheme, _, token = headers.get(b"authorization", b"").decode().partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return False
+
+    try:
+        await get_current_admin_user(await get_current_principal(payload, Loaders()))
+    except HTTPException:
+        return False
+    return True
+
+def _store_profile(profile_id: str, output: str) -> None:
+    """Write a profile and prune the oldest beyond PROFILE_MAX_STORED"""
+    directory = _profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{profile_id}{PROFILE_SUFFIX}").write_text(output)
+    
+    stored = sorted(directory.glob(f"*{PROFILE_SUFFIX}"), reverse=True)
+    for path in stored[settings.PROFILE_MAX_STORED:]:
+        path.unlink(missing_ok=True)
+
+def _route_path(scope) -> Optional[str]:
+    """Template path of the route a request will be dispatched to"""
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+class ProfilingMiddleware:
+    """Runs selected requests under pyinstrument's sampling profiler
+
+    A request is profiled when an admin asks for it with `X-Profile: 1` or
+    `?profile=1`, or when its route is sampled through PROFILE_SAMPLE_RATES.
+    Profiles are stored in PROFILE_DIR in speedscope format and their id is
+    returned in the X-Profile-Id header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.profiler = _load_profiler()
+        self.active = False
+
+    async def _should_profile(self, scope) -> Optional[str]:
+        requested = (
+            dict(scope["headers"]).get(b"x-profile") == b"1"
+            or parse_qs(scope.get("query_string", b"").decode()).get("profile") == ["1"]
+        )
+        if requested and await _is_admin(scope):
+            return "requested"
+
+        if settings.PROFILE_SAMPLE_RATES:
+            rate = settings.PROFILE_SAMPLE_RATES.get(_route_path(scope) or "", 0.0)
+            if rate and random.random() < rate:
+                return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.profiler is None or self.active:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await self._should_profile(scope)
+        # Only one profile runs at a time per worker
+        if reason is None or self.active:
+            await self.app(scope, receive, send)
+            return
+
+        Profiler, SpeedscopeRenderer = self.profiler
+        slug = re.sub(r"[^a-zA-Z0-9]+", "-", scope["path"]).strip("-") or "root"
+        profile_id = f"{int(time.time() * 1000)}-{reason}-{scope['method'].lower()}-{slug}"
+        profiler = Profiler(interval=settings.PROFILE_INTERVAL_SECONDS, async_mode="enabled")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode())
+                ]
+            await send(message)
+
+        self.active = True
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            self.active = False
+            output = profiler.output(renderer=SpeedscopeRenderer())
+            await to_thread.run_sync(_store_profile, profile_id, output)
+
+@router.get("/", response_model=List[str])
+async def list_profiles(current_user: User = Depends(get_current_admin_user)):
+    """List stored profiles, newest first (Admin only)"""
+    directory = _profile_dir()
+    if not directory.is_dir():
+        return []
+    names = [p.name[:-len(PROFILE_SUFFIX)] for p in directory.glob(f"*{PROFILE_SUFFIX}")]
+    return sorted(names, reverse=True)
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Download a stored profile for https://www.speedscope.app (Admin only)"""
+    path = _profile_dir() / f"{profile_id}{PROFILE_SUFFIX}"
+    if "/" in profile_id or ".." in profile_id or not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, media_type="application/json")
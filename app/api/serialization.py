@@ -0,0 +1,75 @@
+import random
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Type, get_args
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+from app.core.config import settings
+
+# PostgREST timestamp: seconds, optional fraction, offset
+TIMESTAMP = re.compile(r"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d{1,6}))?(.*)$")
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+@lru_cache(maxsize=None)
+def optional_fields(model: Type[BaseModel]) -> FrozenSet[str]:
+    """Fields a client may find missing, e.g. notes, phone, avatar_url, location"""
+    return frozenset(name for name, field in model.model_fields.items() if not field.is_required())
+
+@lru_cache(maxsize=None)
+def timestamp_fields(model: Type[BaseModel]) -> FrozenSet[str]:
+    """Fields typed datetime or Optional[datetime]"""
+    return frozenset(
+        name for name, field in model.model_fields.items()
+        if field.annotation is datetime or datetime in get_args(field.annotation)
+    )
+
+def json_timestamp(value: Any) -> Any:
+    """Write a PostgREST timestamp the way pydantic serializes it
+
+    PostgREST trims the fraction and writes UTC as +00:00; pydantic writes
+    six fraction digits (none when zero) and UTC as Z.
+    """
+    match = TIMESTAMP.match(value) if isinstance(value, str) else None
+    if match is None:
+        return value
+    seconds, fraction, offset = match.groups()
+    if fraction and int(fraction):
+        seconds += "." + fraction.ljust(6, "0")
+    return seconds + ("Z" if offset == "+00:00" else offset)
+
+def json_timestamps(rows: List[dict], model: Type[BaseModel]) -> List[dict]:
+    """Rows with their timestamp fields written like pydantic's JSON output"""
+    stamps = timestamp_fields(model)
+    return [{k: json_timestamp(v) if k in stamps else v for k, v in row.items()} for row in rows]
+
+def compact_rows(rows: List[dict], model: Type[BaseModel]) -> List[dict]:
+    """Drop optional fields whose value is null"""
+    optional = optional_fields(model)
+    return [{k: v for k, v in row.items() if v is not None or k not in optional} for row in rows]
+
+def trusted_rows(rows: List[dict], model: Type[BaseModel]) -> List[dict]:
+    """Shape database rows like the response model without validating them
+
+    Rows are limited to the model's fields so columns the model doesn't
+    declare never leak, and timestamps are written as pydantic would. A
+    VALIDATION_SAMPLE_RATE share of calls still validates every row, to
+    catch schema drift in development; the output is the same either way.
+    """
+    if settings.VALIDATION_SAMPLE_RATE and random.random() < settings.VALIDATION_SAMPLE_RATE:
+        for row in rows:
+            model(**row)
+
+    stamps = timestamp_fields(model)
+    fields = [(field, field in stamps) for field in model.model_fields]
+    return [
+        {field: json_timestamp(row.get(field)) if stamp else row.get(field) for field, stamp in fields}
+        for row in rows
+    ]
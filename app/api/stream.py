@@ -0,0 +1,86 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from app.models.schemas import User
+from app.core.config import settings
+from app.core.pubsub import hub, Message, Subscription
+from app.api.dependencies import get_current_user
+from app.api.announcements import is_visible_to
+
+router = APIRouter()
+
+TOPICS = {"announcements", "events"}
+
+class SubscriptionResponse(StreamingResponse):
+    """Streams a subscription and releases it however the response ends
+
+    A generator's finally only runs once iteration has started, so a client
+    gone before the first message would otherwise keep its subscription.
+    """
+
+    def __init__(self, subscription: Subscription, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subscription = subscription
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            hub.unsubscribe(self.subscription)
+
+@router.get("/")
+async def stream_changes(
+    request: Request,
+    topics: str = Query("announcements,events", description="Comma-separated topics to follow"),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream new, updated and deleted announcements and events as server-sent events
+    
+    Messages are named `<topic>.<created|updated|deleted>`. A `resync` event
+    means the client fell too far behind; it should catch up through the
+    /changes endpoints and reconnect.
+    """
+    wanted = {t.strip() for t in topics.split(",") if t.strip()}
+    if not wanted or not wanted <= TOPICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Topics must be among: {', '.join(sorted(TOPICS))}"
+        )
+    
+    role = current_user.role
+    
+    def accepts(message: Message) -> bool:
+        if message.topic not in wanted:
+            return False
+        return message.topic != "announcements" or is_visible_to(message.data, role)
+    
+    subscription = hub.subscribe(accepts)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams"
+        )
+    
+    async def events():
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    timeout=settings.STREAM_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            
+            if message is None:
+                yield "event: resync\ndata: {}\n\n"
+                break
+            yield message.encoded
+    
+    return SubscriptionResponse(
+        subscription,
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Response, status
 from typing import List
-from app.models.schemas import User, UserUpdate
-from app.core.supabase import supabase
-from app.api.dependencies import get_current_user, get_current_admin_user
+from app.models.schemas import BatchRequest, User, UserBatch, UserUpdate
+from app.core.database import table, execute
+from app.core.loader import Loaders
+from app.core.response_cache import response_cache
+from app.api.dependencies import get_current_user, get_current_admin_user, invalidate_principal
+from app.api.pagination import PageParams, select_columns, paginate, page_response
+from app.api.export import ExportParams, export_response
+from app.api.batch import batch_response
 
 router = APIRouter()
 
@@ -20,7 +25,9 @@ async def update_current_user_profile(
     try:
         update_data = user_update.model_dump(exclude_unset=True)
         
-        response = supabase.table("users").update(update_data).eq("id", current_user.id).execute()
+        response = await execute(table("users").update(update_data).eq("id", current_user.id))
+        invalidate_principal(current_user.id)
+        await response_cache.invalidate("users")
         
         if not response.data:
             raise HTTPException(
@@ -39,12 +46,57 @@ async def update_current_user_profile(
         )
 
 @router.get("/", response_model=List[User])
-async def get_all_users(current_user: User = Depends(get_current_admin_user)):
+async def get_all_users(
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: User = Depends(get_current_admin_user)
+):
     """Get all users (Admin only)"""
     try:
-        response = supabase.table("users").select("*").execute()
-        return [User(**user) for user in response.data]
+        query = table("users").select(select_columns(User, page, "created_at"))
+        result = await execute(paginate(query, page, "created_at"))
+        return page_response(result.data, page, User, "created_at", response)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/export")
+async def export_users(
+    params: ExportParams = Depends(),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Stream all users as NDJSON or CSV (Admin only)"""
+    try:
+        return await export_response(
+            lambda select: table("users").select(select),
+            User, params, "created_at", "users"
+        )
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/batch", response_model=UserBatch)
+async def get_users_batch(
+    batch: BatchRequest,
+    loaders: Loaders = Depends(),
+    current_user: User = Depends(get_current_user)
+):
+    """Get up to BATCH_MAX_IDS users by ID in one request"""
+    try:
+        return await batch_response(batch, loaders.users, User)
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -54,19 +106,20 @@ async def get_all_users(current_user: User = Depends(get_current_admin_user)):
 @router.get("/{user_id}", response_model=User)
 async def get_user_by_id(
     user_id: str,
+    loaders: Loaders = Depends(),
     current_user: User = Depends(get_current_user)
 ):
     """Get user by ID"""
     try:
-        response = supabase.table("users").select("*").eq("id", user_id).execute()
+        row = await loaders.users.load(user_id)
         
-        if not response.data:
+        if row is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        return User(**response.data[0])
+        return User(**row)
     
     except HTTPException:
         raise
@@ -79,13 +132,18 @@ async def get_user_by_id(
 @router.get("/role/{role}", response_model=List[User])
 async def get_users_by_role(
     role: str,
+    response: Response,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user)
 ):
     """Get users by role"""
     try:
-        response = supabase.table("users").select("*").eq("role", role).execute()
-        return [User(**user) for user in response.data]
+        query = table("users").select(select_columns(User, page, "created_at")).eq("role", role)
+        result = await execute(paginate(query, page, "created_at"))
+        return page_response(result.data, page, User, "created_at", response)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,24 @@
+"""Rebuild the attendance_summary counters from the raw attendance table.
+
+Run after a migration, a data import, or whenever the counters drift:
+
+    python -m app.commands.rebuild_attendance_summary
+"""
+import asyncio
+from app.core.config import settings
+from app.core.database import rpc, execute
+
+async def rebuild_attendance_summary() -> int:
+    """Recompute every counter and return the number of student/course pairs"""
+    response = await execute(
+        rpc("rebuild_attendance_summary"),
+        timeout=settings.ATTENDANCE_SUMMARY_REBUILD_TIMEOUT_SECONDS
+    )
+    return response.data
+
+def main():
+    pairs = asyncio.run(rebuild_attendance_summary())
+    print(f"Rebuilt attendance summary for {pairs} student/course pairs")
+
+if __name__ == "__main__":
+    main()
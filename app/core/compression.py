@@ -0,0 +1,117 @@
+import gzip
+from typing import Iterable, Optional, Tuple
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.config import settings
+from app.core.metrics import COMPRESSION_BYTES
+
+try:
+    # Optional dependency; without it clients are served gzip only
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies above this size are compressed off the event loop
+OFFLOAD_SIZE = 256 * 1024
+
+def available_encodings() -> Tuple[str, ...]:
+    """Supported encodings in order of preference"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def choose_encoding(accept_encoding: str, encodings: Iterable[str]) -> Optional[str]:
+    """Pick the first of `encodings` the client accepts with a non-zero q-value"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL)
+
+class CompressionMiddleware:
+    """Compresses complete response bodies with brotli or gzip
+
+    Only single-message bodies of at least COMPRESSION_MIN_SIZE bytes with a
+    content type in COMPRESSION_CONTENT_TYPES are compressed. Streamed
+    responses (server-sent events, exports) and bodies that already carry a
+    Content-Encoding are passed through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.encodings = available_encodings()
+        self.content_types = set(settings.COMPRESSION_CONTENT_TYPES)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Hold the headers until the body shows whether it's worth compressing
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            headers = MutableHeaders(scope=held)
+            if not self._compressible(headers):
+                await send(held)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < settings.COMPRESSION_MIN_SIZE:
+                await send(held)
+                await send(message)
+                return
+
+            if len(body) > OFFLOAD_SIZE:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            COMPRESSION_BYTES.labels(encoding, "original").inc(len(body))
+            if len(compressed) >= len(body):
+                COMPRESSION_BYTES.labels(encoding, "compressed").inc(len(body))
+                await send(held)
+                await send(message)
+                return
+
+            COMPRESSION_BYTES.labels(encoding, "compressed").inc(len(compressed))
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            await send(held)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in self.content_types
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "mE-n-CAMPUS-API"
@@ -9,11 +9,111 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_SERVICE_KEY: str
+    SUPABASE_MAX_WORKERS: int = 40  # Threads available for blocking Supabase calls
+    # Keep-alive HTTP connections shared by all Supabase calls in a worker
+    SUPABASE_HTTP2: bool = True  # Needs the h2 package; falls back to HTTP/1.1 without it
+    SUPABASE_MAX_CONNECTIONS: int = 50
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 40
+    SUPABASE_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    SUPABASE_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    SUPABASE_TIMEOUT_SECONDS: float = 30.0  # HTTP timeout for requests made without a deadline
+    # Resilience: per-call deadlines (also the HTTP timeout of the call's
+    # requests), retries for reads, circuit breaker
+    SUPABASE_READ_TIMEOUT_SECONDS: float = 5.0
+    SUPABASE_WRITE_TIMEOUT_SECONDS: float = 10.0
+    SUPABASE_RPC_TIMEOUT_SECONDS: float = 30.0
+    ATTENDANCE_SUMMARY_REBUILD_TIMEOUT_SECONDS: float = 600.0  # Full recount of attendance_summary
+    SUPABASE_READ_RETRIES: int = 2
+    SUPABASE_RETRY_BACKOFF_SECONDS: float = 0.1
+    SUPABASE_RETRY_BUDGET_RATIO: float = 0.2  # Retries allowed per call made
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_SECONDS: float = 30.0
+    
+    # Readiness (/health/ready)
+    HEALTH_PROBE_TTL_SECONDS: float = 5.0  # Reuse dependency probe results this long
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 2.0
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+    READINESS_MAX_LOOP_LAG_SECONDS: float = 0.25
+    READINESS_MAX_POOL_SATURATION: float = 0.9  # Share of SUPABASE_MAX_WORKERS in use
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    REFRESH_TOKEN_FAMILY_MAX_DAYS: int = 90  # Log in again this long after the last login, however active
+    # Where refresh token families live: memory (single worker only) or redis
+    # (required with several workers, see REDIS_URL); unknown families are rejected
+    REFRESH_TOKEN_STORE: str = "memory"
+    REFRESH_TOKEN_STORE_SIZE: int = 100000  # Token families tracked per worker (memory store)
+    # Processes used by the async bcrypt helpers, and how many calls may wait for one
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # Verified access tokens kept in memory until they expire (0 disables)
+    TOKEN_CACHE_SIZE: int = 8192
+    
+    # Principal cache used by get_current_user
+    PRINCIPAL_CACHE_SIZE: int = 4096
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    # Resolve role checks from the token's role claim without a users lookup.
+    # Role changes then take effect when the user's token is reissued.
+    AUTH_CLAIMS_ONLY: bool = False
+    
+    # Pagination
+    PAGE_DEFAULT_LIMIT: int = 50
+    PAGE_MAX_LIMIT: int = 500
+    # Serve list pages as trusted rows encoded with orjson instead of validating
+    # them twice through Pydantic; validate a sample of responses to catch drift
+    FAST_SERIALIZATION: bool = True
+    VALIDATION_SAMPLE_RATE: float = 0.0
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched per Supabase call by export endpoints
+    
+    # Response cache for read-mostly routers
+    RESPONSE_CACHE_BACKEND: str = "memory"  # memory, redis or none
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # Serve cached rows up to this long past their TTL while Supabase is down (0 disables)
+    RESPONSE_CACHE_STALE_SECONDS: int = 300
+    
+    # Server-sent event streams
+    STREAM_QUEUE_SIZE: int = 100  # Pending messages per connection before it must resync
+    STREAM_MAX_CONNECTIONS: int = 1000  # Per worker
+    STREAM_KEEPALIVE_SECONDS: int = 15
+    
+    # Enrollment index
+    ENROLLMENT_INDEX_SIZE: int = 10000
+    ENROLLMENT_INDEX_TTL_SECONDS: int = 300
+    
+    # Attendance
+    ATTENDANCE_BULK_MAX_RECORDS: int = 500
+    
+    # Share one Supabase round trip among concurrent identical reads (per worker)
+    SINGLE_FLIGHT_ENABLED: bool = True
+    
+    # Batch reads (POST /api/{users,courses,events}/batch)
+    BATCH_MAX_IDS: int = 100
+    
+    # Response compression (brotli requires `pip install brotli`)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # Smaller bodies gain little and cost a round of CPU
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json", "text/html", "text/plain", "text/css", "application/javascript"
+    ]
+    
+    # Observability
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True  # Honour X-Server-Timing: 1 request headers
+    
+    # Profiling (requires `pip install pyinstrument`)
+    PROFILE_DIR: str = "profiles"
+    PROFILE_INTERVAL_SECONDS: float = 0.001
+    PROFILE_MAX_STORED: int = 200
+    # Route path -> fraction of requests profiled continuously,
+    # e.g. {"/api/attendance/course/{course_id}": 0.01}
+    PROFILE_SAMPLE_RATES: Dict[str, float] = {}
     
     # CORS
     ALLOWED_ORIGINS: List[str] = ["http://localhost:8081", "http://localhost:19006"]
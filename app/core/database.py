@@ -0,0 +1,211 @@
+import asyncio
+import inspect
+import math
+import threading
+import time
+import uuid
+from typing import Any, Callable, Hashable, Optional, Tuple
+import anyio
+from anyio import CapacityLimiter, to_thread
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.metrics import SUPABASE_RETRIES, observe_supabase_call
+from app.core.resilience import CircuitBreaker, backoff, breaker_for, is_transient, retry_budget
+from app.core.singleflight import SingleFlight
+from app.core.supabase import call_deadline, supabase_pool
+
+# PostgREST operation names by HTTP method
+OPERATIONS = {"GET": "select", "HEAD": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+# Let a call that hits its deadline return while its thread finishes in the
+# background (anyio renamed `cancellable` to `abandon_on_cancel` in 4.1)
+_ABANDON = (
+    {"abandon_on_cancel": True}
+    if "abandon_on_cancel" in inspect.signature(to_thread.run_sync).parameters
+    else {"cancellable": True}
+)
+
+_limiter: Optional[CapacityLimiter] = None
+# Threads are bounded by _limiter slots, which abandoned calls keep; a
+# limiter passed to anyio would hand an abandoned thread's token to the next call
+_threads: Optional[CapacityLimiter] = None
+
+# Identical selects in flight at the same time, e.g. a class-start burst on /api/events/
+reads = SingleFlight()
+
+def get_limiter() -> CapacityLimiter:
+    """Get the limiter bounding concurrent blocking Supabase calls"""
+    global _limiter
+    if _limiter is None:
+        _limiter = CapacityLimiter(settings.SUPABASE_MAX_WORKERS)
+    return _limiter
+
+def _thread_limiter() -> CapacityLimiter:
+    global _threads
+    if _threads is None:
+        _threads = CapacityLimiter(math.inf)
+    return _threads
+
+def canonical_uuid(value: str) -> Optional[str]:
+    """A UUID in the lower-case hyphenated form Postgres returns, or None if it isn't one"""
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        return None
+
+def is_uuid(value: str) -> bool:
+    """Whether a value can be compared with a uuid column without a cast error"""
+    return canonical_uuid(value) is not None
+
+def table(name: str):
+    """Start a query builder for a table"""
+    return supabase_pool.rest.from_(name)
+
+def rpc(function: str, params: Optional[dict] = None):
+    """Start a call to a Postgres function"""
+    return supabase_pool.rest.rpc(function, params or {})
+
+def query_key(query) -> Hashable:
+    """Everything that determines a select's result: path, filters and headers"""
+    return (
+        str(getattr(query, "path", "")),
+        str(getattr(query, "params", "")),
+        tuple(sorted(getattr(query, "headers", {}).items())),
+    )
+
+def describe(query) -> Tuple[str, str]:
+    """Table (or rpc/<function>) and operation of a query builder, for metrics"""
+    path = str(getattr(query, "path", "")).strip("/")
+    if path.startswith("rpc/"):
+        return path, "rpc"
+    return path or "unknown", OPERATIONS.get(str(getattr(query, "http_method", "")).upper(), "unknown")
+
+async def run_sync(func: Callable, *args: Any, timeout: Optional[float] = None) -> Any:
+    """Run a blocking Supabase call on the bounded worker pool
+
+    The call holds a SUPABASE_MAX_WORKERS slot until its thread returns, even
+    when the caller gives up at its deadline first, so the limiter counts
+    every live thread. `timeout` caps each HTTP request the call makes, which
+    keeps abandoned threads from running much past the deadline.
+    """
+    limiter = get_limiter()
+    slot = object()
+    await limiter.acquire_on_behalf_of(slot)
+    loop = asyncio.get_running_loop()
+    # Whoever takes this first releases the slot: the thread once it has
+    # run, or the caller if the call was abandoned before the thread started
+    claim = threading.Lock()
+
+    def release() -> None:
+        try:
+            loop.call_soon_threadsafe(limiter.release_on_behalf_of, slot)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    def call() -> Any:
+        if not claim.acquire(blocking=False):
+            return None
+        call_deadline.set(timeout)
+        try:
+            return func(*args)
+        finally:
+            release()
+
+    try:
+        return await to_thread.run_sync(call, limiter=_thread_limiter(), **_ABANDON)
+    except BaseException:
+        if claim.acquire(blocking=False):
+            limiter.release_on_behalf_of(slot)
+        raise
+
+async def _timed_call(table_name: str, operation: str, timeout: float, func: Callable, *args: Any) -> Any:
+    started = time.perf_counter()
+    try:
+        result = await run_sync(func, *args, timeout=timeout)
+    except Exception:
+        observe_supabase_call(table_name, operation, time.perf_counter() - started, None, ok=False)
+        raise
+    data = getattr(result, "data", None)
+    rows = len(data) if isinstance(data, list) else None
+    observe_supabase_call(table_name, operation, time.perf_counter() - started, rows, ok=True)
+    return result
+
+def _unavailable(breaker: CircuitBreaker) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Supabase is temporarily unavailable",
+        headers={"Retry-After": str(max(1, math.ceil(breaker.retry_after())))}
+    )
+
+def operation_timeout(operation: str) -> float:
+    """Deadline for one attempt of a select, rpc or write"""
+    if operation == "select":
+        return settings.SUPABASE_READ_TIMEOUT_SECONDS
+    if operation == "rpc":
+        return settings.SUPABASE_RPC_TIMEOUT_SECONDS
+    return settings.SUPABASE_WRITE_TIMEOUT_SECONDS
+
+async def _resilient_call(table_name: str, operation: str, timeout: Optional[float],
+                          func: Callable, *args: Any) -> Any:
+    """Run a call under a deadline and the circuit breaker, retrying reads
+
+    Transient failures (timeouts, connection errors, 5xx) count against the
+    breaker and surface as 504/503; errors about the request itself are
+    raised unchanged.
+    """
+    breaker = breaker_for(table_name)
+    read = operation == "select"
+    if timeout is None:
+        timeout = operation_timeout(operation)
+    retries = settings.SUPABASE_READ_RETRIES if read else 0
+    retry_budget.deposit()
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise _unavailable(breaker)
+        try:
+            with anyio.fail_after(timeout):
+                result = await _timed_call(table_name, operation, timeout, func, *args)
+        except Exception as e:
+            if not is_transient(e):
+                # Supabase answered; the request itself was rejected
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt < retries and retry_budget.withdraw():
+                attempt += 1
+                SUPABASE_RETRIES.labels(table_name, operation).inc()
+                await anyio.sleep(backoff(attempt))
+                continue
+            if isinstance(e, TimeoutError):
+                raise HTTPException(
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="Supabase request timed out"
+                ) from e
+            raise _unavailable(breaker) from e
+        finally:
+            breaker.release()
+        breaker.record_success()
+        return result
+
+async def auth_call(func: Callable, *args: Any) -> Any:
+    """Run a Supabase Auth call on the worker pool, timed as auth/<method>"""
+    return await _resilient_call("auth", func.__name__, None, func, *args)
+
+async def execute(query, timeout: Optional[float] = None) -> Any:
+    """Execute a query builder without blocking the event loop
+
+    `timeout` overrides the operation's deadline, for calls known to run
+    long. Concurrent identical selects share one call when
+    SINGLE_FLIGHT_ENABLED is set; their callers get the same result object
+    and must not modify it.
+    """
+    table_name, operation = describe(query)
+    if settings.SINGLE_FLIGHT_ENABLED and operation == "select":
+        return await reads.do(
+            query_key(query),
+            table_name,
+            lambda: _resilient_call(table_name, operation, timeout, query.execute)
+        )
+    return await _resilient_call(table_name, operation, timeout, query.execute)
@@ -0,0 +1,56 @@
+from typing import FrozenSet, Iterable, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+class EnrollmentIndex:
+    """In-process student→courses and course→students index
+
+    Entries are filled from enrollment queries and expire after a TTL, so a
+    worker that missed an invalidation converges on its own. Only the enroll
+    pre-check reads it; schedules and rosters always go through the response
+    cache, so they follow its tag invalidation (shared by workers with redis).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._courses_by_student = TTLCache(maxsize, ttl)
+        self._students_by_course = TTLCache(maxsize, ttl)
+
+    def courses_for(self, student_id: str) -> Optional[FrozenSet[str]]:
+        """Course ids a student is enrolled in, or None if unknown"""
+        return self._courses_by_student.get(student_id)
+
+    def students_for(self, course_id: str) -> Optional[FrozenSet[str]]:
+        """Student ids enrolled in a course, or None if unknown"""
+        return self._students_by_course.get(course_id)
+
+    def set_courses(self, student_id: str, course_ids: Iterable[str]) -> None:
+        self._courses_by_student.set(student_id, frozenset(course_ids))
+
+    def set_students(self, course_id: str, student_ids: Iterable[str]) -> None:
+        self._students_by_course.set(course_id, frozenset(student_ids))
+
+    def is_enrolled(self, student_id: str, course_id: str) -> Optional[bool]:
+        """Answer from whichever side of the index is loaded, or None if neither"""
+        courses = self.courses_for(student_id)
+        if courses is not None:
+            return course_id in courses
+        students = self.students_for(course_id)
+        if students is not None:
+            return student_id in students
+        return None
+
+    def invalidate(self, student_id: Optional[str] = None, course_id: Optional[str] = None) -> None:
+        """Drop the entries touched by an enrollment change"""
+        if student_id is not None:
+            self._courses_by_student.pop(student_id)
+        if course_id is not None:
+            self._students_by_course.pop(course_id)
+
+    def clear(self) -> None:
+        self._courses_by_student.clear()
+        self._students_by_course.clear()
+
+enrollment_index = EnrollmentIndex(
+    maxsize=settings.ENROLLMENT_INDEX_SIZE,
+    ttl=settings.ENROLLMENT_INDEX_TTL_SECONDS
+)
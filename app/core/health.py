@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, List, Optional
+import anyio
+from app.core.config import settings
+from app.core.database import get_limiter, run_sync
+from app.core.metrics import EVENT_LOOP_LAG
+from app.core.resilience import OPEN, breaker_states
+from app.core.supabase import supabase_pool
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a task that sleeps for a fixed interval"""
+
+    def __init__(self, interval: float, window: int = 10):
+        self.interval = interval
+        self.samples = deque([0.0], maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def lag(self) -> float:
+        """Worst lag over the last `window` intervals, so a stall isn't missed between polls"""
+        return max(self.samples)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.samples.append(lag)
+            EVENT_LOOP_LAG.set(lag)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+class CachedProbe:
+    """Runs a dependency check at most once per HEALTH_PROBE_TTL_SECONDS
+
+    Concurrent readiness requests share the in-flight check, so a burst of
+    load balancer polls costs one round trip.
+    """
+
+    def __init__(self, name: str, check: Callable):
+        self.name = name
+        self.check = check
+        self.result: Optional[dict] = None
+        self.checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def run(self) -> dict:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.result is None or time.monotonic() - self.checked_at >= settings.HEALTH_PROBE_TTL_SECONDS:
+                self.result = await self._probe()
+                self.checked_at = time.monotonic()
+        return self.result
+
+    async def _probe(self) -> dict:
+        started = time.perf_counter()
+        try:
+            with anyio.fail_after(settings.HEALTH_PROBE_TIMEOUT_SECONDS):
+                await run_sync(self.check, timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+            error = None
+        except TimeoutError:
+            error = "timed out"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        return {
+            "ok": error is None,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "error": error,
+        }
+
+loop_monitor = LoopLagMonitor(settings.LOOP_LAG_INTERVAL_SECONDS)
+probes = [
+    CachedProbe("postgrest", supabase_pool.probe_rest),
+    CachedProbe("auth", supabase_pool.probe_auth),
+]
+
+def worker_pool_stats() -> dict:
+    """Usage of the thread pool that runs blocking Supabase calls"""
+    limiter = get_limiter()
+    return {
+        "in_use": limiter.borrowed_tokens,
+        "size": int(limiter.total_tokens),
+        "waiting": limiter.statistics().tasks_waiting,
+    }
+
+async def readiness() -> dict:
+    """Dependency, circuit and load checks deciding whether to take traffic"""
+    checks = dict(zip(
+        [probe.name for probe in probes],
+        await asyncio.gather(*(probe.run() for probe in probes))
+    ))
+    circuits = breaker_states()
+    pool = worker_pool_stats()
+
+    reasons: List[str] = []
+    for name, check in checks.items():
+        if not check["ok"]:
+            reasons.append(f"{name} probe failed: {check['error']}")
+    for name, circuit in circuits.items():
+        # A half-open circuit needs traffic for its probe call to close it,
+        # so only a circuit still inside its reset window takes the worker out
+        if circuit["state"] == OPEN:
+            reasons.append(f"{name} circuit open")
+    if loop_monitor.lag > settings.READINESS_MAX_LOOP_LAG_SECONDS:
+        reasons.append(f"event loop lag {loop_monitor.lag * 1000:.0f} ms")
+    if pool["waiting"] and pool["in_use"] >= pool["size"] * settings.READINESS_MAX_POOL_SATURATION:
+        reasons.append(f"worker pool saturated ({pool['waiting']} waiting)")
+
+    return {
+        "status": "unready" if reasons else "ready",
+        "reasons": reasons,
+        "checks": checks,
+        "circuits": circuits,
+        "event_loop_lag_ms": round(loop_monitor.lag * 1000, 1),
+        "worker_pool": pool,
+    }
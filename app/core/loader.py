@@ -0,0 +1,100 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.database import table, execute, canonical_uuid
+from app.core.response_cache import response_cache, cache_key
+
+class Loader:
+    """Coalesces lookups by id into one `in_` query per event loop tick
+
+    Every load() made before the dispatch task first runs is resolved by the
+    same query, each id at most once. Results are kept for the loader's
+    lifetime, so a loader must not outlive the request that created it.
+    Rows of tables with a cache tag go through the response cache. Ids are
+    matched in canonical UUID form, so case doesn't matter; ids that aren't
+    UUIDs resolve to None without a query, as one would make PostgREST
+    reject the whole batch.
+    """
+
+    def __init__(self, table_name: str, tag: Optional[str] = None, column: str = "id"):
+        self.table_name = table_name
+        self.tag = tag
+        self.column = column
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._pending: List[str] = []
+        self._scheduled = False
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self, key: str) -> "asyncio.Future[Optional[dict]]":
+        """Future resolving to the row with this id, or None if it doesn't exist"""
+        canonical = canonical_uuid(key)
+        key = canonical or key
+        future = self._futures.get(key)
+        if future is None or future.cancelled():
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            if canonical is None:
+                future.set_result(None)
+                return future
+            self._pending.append(key)
+            if not self._scheduled:
+                self._scheduled = True
+                loop.call_soon(self._schedule)
+        return future
+
+    async def load_many(self, keys: Iterable[str]) -> List[Optional[dict]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _schedule(self) -> None:
+        # Collect keys in the task's first step rather than here, so tasks
+        # started in the same tick (e.g. by gather) get to add theirs
+        self._task = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        self._scheduled = False
+        for start in range(0, len(keys), settings.BATCH_MAX_IDS):
+            chunk = keys[start:start + settings.BATCH_MAX_IDS]
+            try:
+                rows = await self._fetch(chunk)
+            except asyncio.CancelledError:
+                self._fail(keys[start:], None)
+                raise
+            except Exception as e:
+                self._fail(chunk, e)
+                continue
+
+            found = {str(row[self.column]): row for row in rows}
+            for key in chunk:
+                future = self._futures[key]
+                if not future.done():
+                    future.set_result(found.get(key))
+
+    def _fail(self, keys: List[str], error: Optional[Exception]) -> None:
+        for key in keys:
+            # Forget failed ids so a later load() retries them
+            future = self._futures.pop(key)
+            if future.done():
+                continue
+            if error is None:
+                future.cancel()
+            else:
+                future.set_exception(error)
+
+    async def _fetch(self, keys: List[str]) -> List[dict]:
+        query = table(self.table_name).select("*").in_(self.column, keys)
+        if self.tag is None:
+            return (await execute(query)).data
+        return await response_cache.fetch(
+            cache_key(f"{self.table_name}:batch", None, [("ids", ",".join(sorted(keys)))]),
+            [self.tag],
+            query
+        )
+
+class Loaders:
+    """Per-request loaders; FastAPI resolves `Depends(Loaders)` once per request"""
+
+    def __init__(self):
+        self.users = Loader("users")
+        self.courses = Loader("courses", tag="courses")
+        self.events = Loader("events", tag="events")
@@ -0,0 +1,179 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from app.core.config import settings
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"]
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size by route",
+    ["method", "route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+STAGE_LATENCY = Histogram(
+    "request_stage_duration_seconds",
+    "Time spent in a request stage (jwt, principal, build)",
+    ["stage"]
+)
+SUPABASE_LATENCY = Histogram(
+    "supabase_call_duration_seconds",
+    "Supabase call latency by table and operation",
+    ["table", "operation", "outcome"]
+)
+SUPABASE_ROWS = Histogram(
+    "supabase_rows_returned",
+    "Rows returned by Supabase calls",
+    ["table", "operation"],
+    buckets=(0, 1, 10, 50, 100, 500, 1000, 5000, 10000)
+)
+SUPABASE_ERRORS = Counter(
+    "supabase_call_errors_total",
+    "Failed Supabase calls",
+    ["table", "operation"]
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds",
+    "bcrypt hash/verify latency on the process pool, including queueing",
+    ["operation"]
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "bcrypt calls submitted to the process pool and not yet finished"
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "bcrypt calls rejected because the process pool queue was full",
+    ["operation"]
+)
+SUPABASE_RETRIES = Counter(
+    "supabase_call_retries_total",
+    "Supabase reads retried after a transient failure",
+    ["table", "operation"]
+)
+CIRCUIT_STATE = Gauge(
+    "supabase_circuit_state",
+    "Circuit breaker state (0 closed, 1 half open, 2 open)",
+    ["circuit"]
+)
+CIRCUIT_REJECTIONS = Counter(
+    "supabase_circuit_rejections_total",
+    "Calls failed fast because the circuit was open",
+    ["circuit"]
+)
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "How late the event loop last woke a periodic timer"
+)
+COMPRESSION_BYTES = Counter(
+    "http_response_compression_bytes_total",
+    "Response body bytes before and after compression",
+    ["encoding", "stage"]
+)
+SINGLE_FLIGHT_CALLS = Counter(
+    "supabase_single_flight_calls_total",
+    "Reads that ran a query (leader) or shared an identical in-flight one (shared)",
+    ["table", "kind"]
+)
+STALE_RESPONSES = Counter(
+    "response_cache_stale_served_total",
+    "Cached rows served past their TTL because Supabase was unavailable"
+)
+
+# Per-request (name, seconds) entries, only collected when Server-Timing is requested
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timings", default=None)
+
+def record_timing(name: str, seconds: float) -> None:
+    """Add an entry to the current request's Server-Timing breakdown"""
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+@contextmanager
+def timed(stage: str):
+    """Measure a request stage into the stage histogram and Server-Timing"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.labels(stage).observe(elapsed)
+        record_timing(stage, elapsed)
+
+def observe_supabase_call(table: str, operation: str, seconds: float, rows: Optional[int], ok: bool) -> None:
+    """Record one Supabase round trip"""
+    SUPABASE_LATENCY.labels(table, operation, "ok" if ok else "error").observe(seconds)
+    if ok:
+        if rows is not None:
+            SUPABASE_ROWS.labels(table, operation).observe(rows)
+    else:
+        SUPABASE_ERRORS.labels(table, operation).inc()
+    record_timing("db", seconds)
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Format entries as a Server-Timing header, summing repeated names"""
+    totals: Dict[str, List[float]] = {}
+    for name, seconds in timings:
+        totals.setdefault(name, []).append(seconds)
+    parts = [
+        f'{name};dur={sum(values) * 1000:.2f};desc="{len(values)} call(s)"'
+        for name, values in totals.items()
+    ]
+    parts.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in Prometheus text format, with its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+class MetricsMiddleware:
+    """Records per-route latency and response size for every HTTP request
+
+    Clients can opt in to a Server-Timing breakdown by sending
+    `X-Server-Timing: 1` when SERVER_TIMING_ENABLED is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        wants_timing = settings.SERVER_TIMING_ENABLED and any(
+            name == b"x-server-timing" and value == b"1" for name, value in scope["headers"]
+        )
+        token = _timings.set([] if wants_timing else None)
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timings = _timings.get()
+                if timings is not None:
+                    header = server_timing_header(timings, time.perf_counter() - started)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode())
+                    ]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, path, str(status_code)).observe(time.perf_counter() - started)
+            RESPONSE_SIZE.labels(method, path).observe(size)
+            _timings.reset(token)
@@ -0,0 +1,67 @@
+import asyncio
+import json
+from typing import Callable, Optional, Set
+from app.core.config import settings
+
+class Message:
+    """A published change, encoded once as a server-sent event"""
+
+    def __init__(self, topic: str, event: str, data: dict):
+        self.topic = topic
+        self.event = event
+        self.data = data
+        self.encoded = f"event: {topic}.{event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+class Subscription:
+    """A connection's bounded queue of messages
+
+    A subscriber that falls a full queue behind is not allowed to grow
+    memory: its backlog is dropped and it receives a single None, telling
+    the stream to ask the client to resync and close.
+    """
+
+    def __init__(self, accepts: Callable[[Message], bool], maxsize: int):
+        self.accepts = accepts
+        self.queue: "asyncio.Queue[Optional[Message]]" = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def offer(self, message: Message) -> None:
+        if self.overflowed or not self.accepts(message):
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+class Hub:
+    """In-process fan-out of published changes to connected subscribers"""
+
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscriptions: Set[Subscription] = set()
+
+    def subscribe(self, accepts: Callable[[Message], bool]) -> Optional[Subscription]:
+        """Register a subscriber, or return None when the worker is at capacity"""
+        if len(self._subscriptions) >= self.max_subscribers:
+            return None
+        subscription = Subscription(accepts, self.queue_size)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def publish(self, topic: str, event: str, data: dict) -> None:
+        """Fan a change out to every interested subscriber without waiting"""
+        message = Message(topic, event, data)
+        for subscription in list(self._subscriptions):
+            subscription.offer(message)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+hub = Hub(queue_size=settings.STREAM_QUEUE_SIZE, max_subscribers=settings.STREAM_MAX_CONNECTIONS)
@@ -0,0 +1,62 @@
+from typing import Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Each refresh token family maps to the jti of its one current token, or
+# REVOKED once a stale token from the family has been presented again.
+REVOKED = "revoked"
+
+class MemoryFamilyStore:
+    """Per-process store, only correct with a single worker
+
+    Families started on another worker, or lost to a restart or eviction,
+    are unknown here and their tokens are rejected.
+    """
+
+    def __init__(self, maxsize: int):
+        self._families = TTLCache(maxsize=maxsize, ttl=0)
+
+    async def start(self, family: str, jti: str, ttl: int) -> None:
+        self._families.set(family, jti, ttl)
+
+    async def rotate(self, family: str, jti: str, ttl: int) -> Optional[str]:
+        previous = self._families.get(family)
+        self._families.set(family, jti, ttl)
+        return previous
+
+    async def revoke(self, family: str, ttl: int) -> None:
+        self._families.set(family, REVOKED, ttl)
+
+class RedisFamilyStore:
+    """Store shared by all workers through any Redis-protocol server"""
+
+    def __init__(self, url: str, prefix: str = "refresh:"):
+        # Optional dependency, only needed for REFRESH_TOKEN_STORE=redis
+        from redis import asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+
+    async def start(self, family: str, jti: str, ttl: int) -> None:
+        await self._redis.set(self._prefix + family, jti, ex=ttl)
+
+    async def rotate(self, family: str, jti: str, ttl: int) -> Optional[str]:
+        # GETSET swaps atomically, so two workers can't both rotate the same token
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.getset(self._prefix + family, jti)
+            pipe.expire(self._prefix + family, ttl)
+            previous, _ = await pipe.execute()
+        return previous
+
+    async def revoke(self, family: str, ttl: int) -> None:
+        await self._redis.set(self._prefix + family, REVOKED, ex=ttl)
+
+def get_family_store():
+    """Create the store selected by REFRESH_TOKEN_STORE"""
+    if settings.REFRESH_TOKEN_STORE == "redis":
+        return RedisFamilyStore(settings.REDIS_URL)
+    if settings.REFRESH_TOKEN_STORE == "memory":
+        return MemoryFamilyStore(settings.REFRESH_TOKEN_STORE_SIZE)
+    raise ValueError(f"Unknown REFRESH_TOKEN_STORE {settings.REFRESH_TOKEN_STORE!r}")
+
+family_store = get_family_store()
@@ -0,0 +1,129 @@
+import random
+import time
+from typing import Dict
+import httpx
+from gotrue.errors import AuthRetryableError
+from postgrest.exceptions import APIError
+from app.core.config import settings
+from app.core.metrics import CIRCUIT_REJECTIONS, CIRCUIT_STATE
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitBreaker:
+    """Fails calls fast after repeated upstream failures
+
+    After BREAKER_FAILURE_THRESHOLD consecutive failures the circuit opens
+    and calls are rejected for BREAKER_RESET_SECONDS. A single probe call is
+    then let through; its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        CIRCUIT_STATE.labels(name).set(STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_STATE.labels(self.name).set(STATE_VALUES[state])
+
+    def current_state(self) -> str:
+        """State as the next call would see it: an open circuit past its reset
+        window is half-open even before traffic arrives to move it there"""
+        if self.state == OPEN and self.retry_after() == 0:
+            return HALF_OPEN
+        return self.state
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed"""
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        if self.state == OPEN and self.retry_after() == 0:
+            self._set_state(HALF_OPEN)
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+        CIRCUIT_REJECTIONS.labels(self.name).inc()
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probing = False
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def release(self) -> None:
+        """Free the probe slot of a call that ended without an outcome (cancelled)"""
+        self.probing = False
+
+    def snapshot(self) -> dict:
+        state = self.current_state()
+        return {
+            "state": state,
+            "failures": self.failures,
+            "retry_after": round(self.retry_after(), 1) if state == OPEN else 0,
+        }
+
+class RetryBudget:
+    """Caps retries to a fraction of calls so retries can't multiply an outage
+
+    Every first attempt deposits `ratio` tokens and every retry spends one.
+    """
+
+    def __init__(self, ratio: float, reserve: float = 10.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+
+    def deposit(self) -> None:
+        self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether an error means Supabase is unreachable or overloaded, not that the request was bad"""
+    if isinstance(exc, (TimeoutError, httpx.TransportError, AuthRetryableError)):
+        return True
+    if isinstance(exc, APIError):
+        code = str(exc.code or "")
+        # PGRST000-003: PostgREST can't reach or is waiting on the database;
+        # numeric 5xx codes come from gateway error pages
+        return code.startswith("PGRST00") or (code.isdigit() and code.startswith("5"))
+    return False
+
+def backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number `attempt`"""
+    return random.uniform(0, settings.SUPABASE_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+breakers: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(name, settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_SECONDS)
+    for name in ("postgrest", "auth")
+}
+retry_budget = RetryBudget(settings.SUPABASE_RETRY_BUDGET_RATIO)
+
+def breaker_for(table_name: str) -> CircuitBreaker:
+    return breakers["auth" if table_name == "auth" else "postgrest"]
+
+def breaker_states() -> Dict[str, dict]:
+    """Current state of every circuit, for /health"""
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
@@ -0,0 +1,142 @@
+import json
+import logging
+import time
+from typing import Any, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+from fastapi import HTTPException
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import execute
+from app.core.metrics import STALE_RESPONSES
+
+logger = logging.getLogger(__name__)
+
+# Entries record the version of each tag they were built under; invalidating
+# a tag bumps its version so every entry carrying it stops matching.
+
+class NullBackend:
+    """Backend used when response caching is disabled"""
+
+    async def read(self, key: str, tags: List[str]) -> Tuple[Optional[dict], Optional[list]]:
+        return None, None
+
+    async def write(self, key: str, entry: dict, ttl: int) -> None:
+        pass
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        pass
+
+class MemoryBackend:
+    """Per-process LRU backend"""
+
+    def __init__(self, maxsize: int):
+        self._entries = TTLCache(maxsize=maxsize, ttl=0)
+        self._versions = {}
+
+    async def read(self, key: str, tags: List[str]) -> Tuple[Optional[dict], Optional[list]]:
+        return self._entries.get(key), [self._versions.get(tag, 0) for tag in tags]
+
+    async def write(self, key: str, entry: dict, ttl: int) -> None:
+        self._entries.set(key, entry, ttl)
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+class RedisBackend:
+    """Backend shared by all workers through any Redis-protocol server"""
+
+    def __init__(self, url: str, prefix: str = "cache:"):
+        # Optional dependency, only needed for RESPONSE_CACHE_BACKEND=redis
+        from redis import asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._prefix}tag:{tag}"
+
+    async def read(self, key: str, tags: List[str]) -> Tuple[Optional[dict], Optional[list]]:
+        values = await self._redis.mget([self._prefix + key] + [self._tag_key(tag) for tag in tags])
+        entry = json.loads(values[0]) if values[0] is not None else None
+        return entry, [int(v) if v is not None else 0 for v in values[1:]]
+
+    async def write(self, key: str, entry: dict, ttl: int) -> None:
+        await self._redis.set(self._prefix + key, json.dumps(entry), ex=ttl)
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(self._tag_key(tag))
+            await pipe.execute()
+
+def cache_key(route: str, role: Any = None, params: Optional[Iterable[Tuple[str, str]]] = None) -> str:
+    """Build a cache key from the route, the caller's role and its query params"""
+    role = getattr(role, "value", role) or "-"
+    query = urlencode(sorted(params)) if params else ""
+    return f"{route}|{role}|{query}"
+
+class ResponseCache:
+    """Caches query rows for read endpoints, invalidated by tag"""
+
+    def __init__(self, backend, ttl: int, stale_ttl: int = 0):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    async def fetch(self, key: str, tags: List[str], query) -> list:
+        """Return the rows for a query, executing it only on a cache miss"""
+        try:
+            entry, versions = await self.backend.read(key, tags)
+        except Exception:
+            logger.warning("Response cache read failed for %s", key, exc_info=True)
+            entry, versions = None, None
+
+        if (
+            entry is not None
+            and entry["versions"] == versions
+            and time.time() - entry.get("stored_at", 0) <= self.ttl
+        ):
+            return entry["data"]
+
+        try:
+            response = await execute(query)
+        except HTTPException as e:
+            # Supabase is down or the circuit is open: stale rows beat an error
+            if e.status_code in (503, 504) and entry is not None and self.stale_ttl:
+                STALE_RESPONSES.inc()
+                logger.warning("Serving stale cache entry for %s", key)
+                return entry["data"]
+            raise
+
+        # Versions were read before the query, so an invalidation that races
+        # with it leaves this entry already stale rather than silently current
+        if versions is not None:
+            try:
+                entry = {"versions": versions, "stored_at": time.time(), "data": response.data}
+                await self.backend.write(key, entry, self.ttl + self.stale_ttl)
+            except Exception:
+                logger.warning("Response cache write failed for %s", key, exc_info=True)
+
+        return response.data
+
+    async def invalidate(self, *tags: str) -> None:
+        """Expire every cached entry carrying any of the tags"""
+        try:
+            await self.backend.bump(tags)
+        except Exception:
+            logger.warning("Response cache invalidation failed for %s", tags, exc_info=True)
+
+def get_cache_backend():
+    """Create the backend selected by RESPONSE_CACHE_BACKEND"""
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(settings.REDIS_URL)
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+    return NullBackend()
+
+response_cache = ResponseCache(
+    get_cache_backend(),
+    settings.RESPONSE_CACHE_TTL_SECONDS,
+    settings.RESPONSE_CACHE_STALE_SECONDS
+)
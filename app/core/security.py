@@ -1,11 +1,30 @@
+import asyncio
+import hashlib
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_LATENCY, PASSWORD_HASH_PENDING, PASSWORD_HASH_REJECTED
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class PasswordHashBusy(Exception):
+    """Raised when too many bcrypt calls are already queued on the pool"""
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pending = 0
+
+# Verified token payloads and revoked tokens, keyed by token digest and kept until exp
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=0)
+revoked_tokens = TTLCache(maxsize=max(settings.TOKEN_CACHE_SIZE, 1024), ttl=0)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -14,6 +33,61 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+def get_hash_pool() -> ProcessPoolExecutor:
+    """Get the process pool that runs bcrypt off the event loop"""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_pool
+
+def _discard_hash_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a broken pool so the next call starts a fresh one"""
+    global _hash_pool
+    if _hash_pool is pool:
+        _hash_pool = None
+    pool.shutdown(wait=False)
+
+def shutdown_hash_pool() -> None:
+    """Stop the bcrypt worker processes"""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False)
+        _hash_pool = None
+
+async def _run_hashing(operation: str, func: Callable, *args: Any) -> Any:
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        PASSWORD_HASH_REJECTED.labels(operation).inc()
+        raise PasswordHashBusy(f"{_hash_pending} password hash calls already pending")
+
+    _hash_pending += 1
+    PASSWORD_HASH_PENDING.inc()
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        pool = get_hash_pool()
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory) and took the pool with it
+            _discard_hash_pool(pool)
+            return await loop.run_in_executor(get_hash_pool(), func, *args)
+    finally:
+        _hash_pending -= 1
+        PASSWORD_HASH_PENDING.dec()
+        PASSWORD_HASH_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash on the bcrypt process pool"""
+    return await _run_hashing("verify", verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash on the bcrypt process pool"""
+    return await _run_hashing("hash", get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -26,10 +100,80 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def decode_access_token(token: str) -> Optional[dict]:
-    """Decode JWT access token"""
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def _seconds_left(payload: dict) -> float:
+    exp = payload.get("exp")
+    return float(exp) - time.time() if isinstance(exp, (int, float)) else 0.0
+
+def verify_access_token(token: str) -> Optional[dict]:
+    """Verify a JWT's signature and claims without the token cache"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
         return None
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Decode JWT access token"""
+    key = _token_key(token)
+    if revoked_tokens.get(key) is not None:
+        return None
+
+    cached = token_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    payload = verify_access_token(token)
+    if payload is None or payload.get("type") == "refresh":
+        return None
+    seconds_left = _seconds_left(payload)
+    if seconds_left > 0:
+        token_cache.set(key, payload, ttl=seconds_left)
+    return dict(payload)
+
+def create_refresh_token(
+    user_id: str,
+    role: str,
+    family: Optional[str] = None,
+    family_started: Optional[int] = None
+) -> Tuple[str, dict]:
+    """Create a refresh token in a new or existing family, returning it with its claims
+
+    Rotation moves `exp` forward, but never past REFRESH_TOKEN_FAMILY_MAX_DAYS
+    after the family started (`fst`, the login time).
+    """
+    now = datetime.utcnow()
+    started = family_started or int(time.time())
+    family_end = datetime.utcfromtimestamp(started) + timedelta(days=settings.REFRESH_TOKEN_FAMILY_MAX_DAYS)
+    claims = {
+        "sub": user_id,
+        "role": role,
+        "type": "refresh",
+        "fam": family or uuid.uuid4().hex,
+        "fst": started,
+        "jti": uuid.uuid4().hex,
+        "exp": min(now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS), family_end),
+    }
+    token = jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return token, claims
+
+def decode_refresh_token(token: str) -> Optional[dict]:
+    """Decode a refresh token, rejecting access tokens"""
+    payload = verify_access_token(token)
+    if payload is None or payload.get("type") != "refresh":
+        return None
+    if not all(payload.get(claim) for claim in ("sub", "role", "fam", "fst", "jti")):
+        return None
+    return payload
+
+def revoke_access_token(token: str) -> None:
+    """Reject a token from now until it expires (in this worker)"""
+    payload = verify_access_token(token)
+    if payload is None:
+        return
+    key = _token_key(token)
+    token_cache.pop(key)
+    seconds_left = _seconds_left(payload)
+    if seconds_left > 0:
+        revoked_tokens.set(key, True, ttl=seconds_left)
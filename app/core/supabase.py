@@ -1,13 +1,166 @@
-from supabase import create_client, Client
+import importlib.util
+import logging
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Optional, Union
+import httpx
+from gotrue import SyncGoTrueClient
+from gotrue.http_clients import SyncClient as AuthHttpClient
+from postgrest import SyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from postgrest.utils import SyncClient as RestHttpClient
 from app.core.config import settings
 
-def get_supabase_client() -> Client:
-    """Get Supabase client instance"""
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+logger = logging.getLogger(__name__)
 
-def get_supabase_admin_client() -> Client:
-    """Get Supabase admin client with service role key"""
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+# Deadline of the call running in this worker thread, set by database.run_sync
+call_deadline: ContextVar[Optional[float]] = ContextVar("call_deadline", default=None)
 
-supabase: Client = get_supabase_client()
-supabase_admin: Client = get_supabase_admin_client()
+def _api_headers(key: str) -> Dict[str, str]:
+    return {"apiKey": key, "Authorization": f"Bearer {key}"}
+
+def _connection_options() -> dict:
+    """httpx pool settings shared by the PostgREST and Auth connections"""
+    http2 = settings.SUPABASE_HTTP2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("SUPABASE_HTTP2 is set but h2 is not installed; using HTTP/1.1")
+        http2 = False
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        "timeout": httpx.Timeout(
+            settings.SUPABASE_TIMEOUT_SECONDS,
+            connect=settings.SUPABASE_CONNECT_TIMEOUT_SECONDS,
+        ),
+    }
+
+def deadline_timeout(seconds: float) -> httpx.Timeout:
+    """httpx timeouts for a request that must finish within `seconds`"""
+    return httpx.Timeout(seconds, connect=min(seconds, settings.SUPABASE_CONNECT_TIMEOUT_SECONDS))
+
+class DeadlineRequestsMixin:
+    """Time requests out at the current call's deadline instead of the client default
+
+    A call abandoned at its deadline keeps its worker thread (and connection)
+    until the HTTP request returns, so the request must not outlive it.
+    """
+
+    def request(self, *args, **kwargs):
+        deadline = call_deadline.get()
+        if deadline is not None and "timeout" not in kwargs:
+            kwargs["timeout"] = deadline_timeout(deadline)
+        return super().request(*args, **kwargs)
+
+class DeadlineRestHttpClient(DeadlineRequestsMixin, RestHttpClient):
+    pass
+
+class DeadlineAuthHttpClient(DeadlineRequestsMixin, AuthHttpClient):
+    pass
+
+class PooledPostgrestClient(SyncPostgrestClient):
+    """PostgREST client whose session uses the configured connection pool"""
+
+    def __init__(self, base_url: str, headers: Dict[str, str], options: dict):
+        self._options = options
+        super().__init__(
+            base_url,
+            headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, **headers},
+            timeout=options["timeout"]
+        )
+
+    def create_session(self, base_url: str, headers: Dict[str, str],
+                       timeout: Union[int, float, httpx.Timeout]) -> RestHttpClient:
+        return DeadlineRestHttpClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=self._options["limits"],
+            http2=self._options["http2"],
+        )
+
+class SupabasePool:
+    """Keep-alive connections to Supabase, opened on startup and closed on shutdown
+
+    Data queries share one PostgREST client authenticated with the anon key.
+    Auth calls that hold a user session (sign in) get a client of their own
+    per request, so concurrent logins never see each other's session; all
+    of them reuse the same pooled HTTP connections.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._rest: Optional[PooledPostgrestClient] = None
+        self._auth_http: Optional[AuthHttpClient] = None
+        self._admin_auth: Optional[SyncGoTrueClient] = None
+
+    def start(self) -> None:
+        """Open the connection pools (idempotent)"""
+        with self._lock:
+            if self._rest is not None:
+                return
+            options = _connection_options()
+            self._rest = PooledPostgrestClient(
+                f"{settings.SUPABASE_URL}/rest/v1",
+                _api_headers(settings.SUPABASE_KEY),
+                options
+            )
+            self._auth_http = DeadlineAuthHttpClient(**options)
+            self._admin_auth = self._new_auth_client(settings.SUPABASE_SERVICE_KEY)
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        with self._lock:
+            if self._rest is not None:
+                self._rest.session.close()
+                self._auth_http.close()
+            self._rest = self._auth_http = self._admin_auth = None
+
+    def _new_auth_client(self, key: str) -> SyncGoTrueClient:
+        return SyncGoTrueClient(
+            url=f"{settings.SUPABASE_URL}/auth/v1",
+            headers=_api_headers(key),
+            http_client=self._auth_http,
+            auto_refresh_token=False,
+            persist_session=False,
+        )
+
+    @property
+    def rest(self) -> PooledPostgrestClient:
+        """Shared PostgREST client, started on first use outside the app lifespan"""
+        if self._rest is None:
+            self.start()
+        return self._rest
+
+    @property
+    def admin_auth(self) -> SyncGoTrueClient:
+        """Auth client with the service role key, for stateless admin calls"""
+        if self._admin_auth is None:
+            self.start()
+        return self._admin_auth
+
+    def probe_rest(self) -> None:
+        """Cheapest PostgREST round trip that also reaches the database"""
+        response = self.rest.session.get("/users", params={"select": "id", "limit": "1"})
+        response.raise_for_status()
+
+    def probe_auth(self) -> None:
+        """Supabase Auth health endpoint"""
+        if self._auth_http is None:
+            self.start()
+        response = self._auth_http.get(
+            f"{settings.SUPABASE_URL}/auth/v1/health",
+            headers=_api_headers(settings.SUPABASE_KEY)
+        )
+        response.raise_for_status()
+
+    def auth_client(self) -> SyncGoTrueClient:
+        """Request-scoped auth client with the anon key"""
+        if self._auth_http is None:
+            self.start()
+        return self._new_auth_client(settings.SUPABASE_KEY)
+
+supabase_pool = SupabasePool()
@@ -30,7 +30,20 @@ class UserRegister(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
-    user: dict
+    refresh_token: Optional[str] = None
+    user: Optional[dict] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class Principal(BaseModel):
+    """Authenticated identity resolved from token claims alone"""
+    id: str
+    role: UserRole
+
+# Batch Schemas
+class BatchRequest(BaseModel):
+    ids: List[str]
 
 # User Schemas
 class UserBase(BaseModel):
@@ -55,6 +68,10 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class UserBatch(BaseModel):
+    items: List[User]
+    missing: List[str]
+
 # Course Schemas
 class CourseBase(BaseModel):
     name: str
@@ -74,10 +91,15 @@ class CourseUpdate(BaseModel):
 class Course(CourseBase):
     id: str
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class CourseBatch(BaseModel):
+    items: List[Course]
+    missing: List[str]
+
 # Enrollment Schema
 class EnrollmentCreate(BaseModel):
     student_id: str
@@ -117,6 +139,50 @@ class Attendance(BaseModel):
     class Config:
         from_attributes = True
 
+class AttendanceCounts(BaseModel):
+    present: int = 0
+    absent: int = 0
+    late: int = 0
+    stw: int = 0
+    total: int = 0
+    attendance_rate: float = 0.0  # (present + late + stw) / total
+
+class StudentCourseAttendanceStats(AttendanceCounts):
+    student_id: str
+    course_id: str
+
+class AttendanceStats(BaseModel):
+    student_id: Optional[str] = None
+    course_id: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    overall: AttendanceCounts
+    breakdown: List[StudentCourseAttendanceStats]
+
+class AttendanceBulkEntry(BaseModel):
+    student_id: str
+    status: AttendanceStatus
+    notes: Optional[str] = None
+
+class AttendanceBulkCreate(BaseModel):
+    course_id: str
+    date: datetime
+    records: List[AttendanceBulkEntry]
+
+class AttendanceBulkResult(BaseModel):
+    student_id: str
+    result: str  # created, updated, error
+    attendance: Optional[Attendance] = None
+    error: Optional[str] = None
+
+class AttendanceBulkResponse(BaseModel):
+    course_id: str
+    date: datetime
+    created: int
+    updated: int
+    failed: int
+    results: List[AttendanceBulkResult]
+
 # Event Schemas
 class EventBase(BaseModel):
     title: str
@@ -137,10 +203,21 @@ class EventUpdate(BaseModel):
 class Event(EventBase):
     id: str
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class EventChanges(BaseModel):
+    changed: List[Event]
+    deleted: List[str]
+    cursor: str
+    has_more: bool
+
+class EventBatch(BaseModel):
+    items: List[Event]
+    missing: List[str]
+
 # Announcement Schemas
 class AnnouncementBase(BaseModel):
     title: str
@@ -159,6 +236,13 @@ class AnnouncementUpdate(BaseModel):
 class Announcement(AnnouncementBase):
     id: str
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
+
+class AnnouncementChanges(BaseModel):
+    changed: List[Announcement]
+    deleted: List[str]
+    cursor: str
+    has_more: bool
@@ -0,0 +1,71 @@
+"""Concurrent-request throughput of the API against the fake Supabase server.
+
+Runs the same load twice: once with Supabase calls executed inline on the
+event loop (the old behaviour) and once through the bounded worker pool in
+app.core.database.
+
+    python -m benchmarks.concurrency --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import time
+
+PORT = 54321
+
+os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{PORT}")
+os.environ.setdefault("SUPABASE_KEY", "fake-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "fake-service-key")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+
+from app.core import database
+from app.core.security import create_access_token
+from benchmarks import fake_supabase as fake
+from main import app
+
+async def _inline(func, *args, timeout=None):
+    return func(*args)
+
+async def run_load(path: str, requests: int, concurrency: int) -> float:
+    """Fire requests at the app and return throughput in requests/second"""
+    token = create_access_token({"sub": fake.user_id(0), "role": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(path, headers=headers)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return requests / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", default="/api/events/")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    fake.add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    fake.serve(fake.build_campus(args), PORT, args.latency)
+
+    offloaded = database.run_sync
+    database.run_sync = _inline
+    blocking = asyncio.run(run_load(args.path, args.requests, args.concurrency))
+    database.run_sync = offloaded
+    pooled = asyncio.run(run_load(args.path, args.requests, args.concurrency))
+
+    print(f"{'mode':<12}{'req/s':>10}")
+    print(f"{'blocking':<12}{blocking:>10.1f}")
+    print(f"{'worker pool':<12}{pooled:>10.1f}")
+    print(f"speedup: {pooled / blocking:.1f}x")
+
+if __name__ == "__main__":
+    main()
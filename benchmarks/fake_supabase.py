@@ -0,0 +1,606 @@
+"""Local stand-in for Supabase (PostgREST + GoTrue) seeded with a synthetic campus.
+
+Implements the subset of PostgREST the API uses: eq/neq/gt/gte/lt/lte/in
+filters, the keyset `or=` filter built by app.api.pagination, multi-column
+ordering, limit, column projection, one-level resource embedding, inserts,
+upserts, updates, deletes and the RPC functions from supabase/migrations.
+GoTrue supports password sign-in, admin user creation, logout and health.
+
+Attendance rows are derived arithmetically from their row number instead of
+being stored, so millions of rows cost no memory; writes go to an overlay.
+
+    python -m benchmarks.fake_supabase --port 54321 --attendance 2000000
+"""
+import argparse
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Optional
+from urllib.parse import parse_qsl, urlparse
+
+EPOCH = datetime(2025, 7, 1, 9, 0, tzinfo=timezone.utc)
+STATUSES = ("present", "absent", "late", "stw")
+PASSWORD = "benchmark-password"
+
+# Disjoint id ranges per table keep ids deterministic and invertible
+USER_BASE, COURSE_BASE, ENROLLMENT_BASE = 1, 10 ** 7, 2 * 10 ** 7
+EVENT_BASE, ANNOUNCEMENT_BASE, ATTENDANCE_BASE = 3 * 10 ** 7, 4 * 10 ** 7, 10 ** 9
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "or", "on_conflict", "columns"}
+KEYSET = re.compile(
+    r'^\((\w+)\.(gt|lt)\."(.*?)",and\(\w+\.eq\."(.*?)",id\.(gt|lt)\."(.*?)"\)\)$'
+)
+
+def make_id(base: int, index: int) -> str:
+    return str(uuid.UUID(int=base + index))
+
+def user_id(i: int) -> str:
+    return make_id(USER_BASE, i)
+
+def course_id(j: int) -> str:
+    return make_id(COURSE_BASE, j)
+
+def event_id(k: int) -> str:
+    return make_id(EVENT_BASE, k)
+
+def announcement_id(k: int) -> str:
+    return make_id(ANNOUNCEMENT_BASE, k)
+
+def iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+def now() -> str:
+    return iso(datetime.now(timezone.utc))
+
+class Campus:
+    """Synthetic dataset sized by the command-line options"""
+
+    def __init__(self, users: int, teachers: int, courses: int, per_student: int,
+                 attendance: int, events: int, announcements: int):
+        self.n_users = users
+        self.n_teachers = teachers
+        self.n_courses = courses
+        self.lock = Lock()
+
+        self.tables = {
+            "users": [self._user(i) for i in range(users)],
+            "courses": [self._course(j) for j in range(courses)],
+            "events": [self._event(k) for k in range(events)],
+            "announcements": [self._announcement(k) for k in range(announcements)],
+            "enrollments": [],
+            "deleted_records": [],
+        }
+
+        students = range(1 + teachers, users)
+        for i in students:
+            for k in range(per_student):
+                j = (i * 7 + k * 31) % courses
+                self.tables["enrollments"].append({
+                    "id": make_id(ENROLLMENT_BASE, len(self.tables["enrollments"])),
+                    "student_id": user_id(i),
+                    "course_id": course_id(j),
+                    "enrolled_at": iso(EPOCH),
+                })
+
+        self.index = {}
+        for name in ("users", "courses", "events", "announcements"):
+            self.index[name] = {row["id"]: row for row in self.tables[name]}
+
+        # Enrollment n carries attendance rows n, n + E, n + 2E, ... (one per day)
+        self.enrollment_pairs = [(e["student_id"], e["course_id"]) for e in self.tables["enrollments"]]
+        self.n_attendance = attendance
+        self.by_course, self.by_student = {}, {}
+        for n, (sid, cid) in enumerate(self.enrollment_pairs):
+            self.by_course.setdefault(cid, []).append(n)
+            self.by_student.setdefault(sid, []).append(n)
+        self.overlay = {}  # Updated computed rows by id
+        self.added = {}  # Inserted rows by id
+        self.deleted = set()
+        # Stands in for the writing transaction's id (change_seq columns)
+        self.last_change_seq = max(events, announcements)
+
+    def next_change_seq(self) -> int:
+        self.last_change_seq += 1
+        return self.last_change_seq
+
+    def _user(self, i: int) -> dict:
+        role = "admin" if i == 0 else "teacher" if i <= self.n_teachers else "student"
+        return {
+            "id": user_id(i),
+            "email": f"user{i}@campus.edu",
+            "full_name": f"User {i}",
+            "role": role,
+            "phone": None if i % 3 else f"+91-90000{i:05d}",
+            "avatar_url": None,
+            "created_at": iso(EPOCH + timedelta(minutes=i)),
+        }
+
+    def _course(self, j: int) -> dict:
+        return {
+            "id": course_id(j),
+            "name": f"Course {j}",
+            "code": f"CS{j:04d}",
+            "description": "Synthetic course used for benchmarking" if j % 2 else None,
+            "credits": 3 + j % 3,
+            "teacher_id": user_id(1 + j % self.n_teachers),
+            "created_at": iso(EPOCH + timedelta(minutes=j)),
+            "updated_at": iso(EPOCH + timedelta(minutes=j)),
+        }
+
+    def _event(self, k: int) -> dict:
+        return {
+            "id": event_id(k),
+            "title": f"Event {k}",
+            "description": "Synthetic event " * 8,
+            "event_date": iso(EPOCH + timedelta(hours=6 * k)),
+            "location": None if k % 4 else "Main auditorium",
+            "organizer_id": user_id(1 + k % self.n_teachers),
+            "created_at": iso(EPOCH + timedelta(minutes=k)),
+            "updated_at": iso(EPOCH + timedelta(minutes=k)),
+            "change_seq": k + 1,
+        }
+
+    def _announcement(self, k: int) -> dict:
+        return {
+            "id": announcement_id(k),
+            "title": f"Announcement {k}",
+            "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 12,
+            "author_id": user_id(1 + k % self.n_teachers),
+            "target_audience": ("all", "student", "teacher")[k % 3],
+            "created_at": iso(EPOCH + timedelta(minutes=k)),
+            "updated_at": iso(EPOCH + timedelta(minutes=k)),
+            "change_seq": k + 1,
+        }
+
+    # Attendance rows are computed, not stored
+
+    @property
+    def n_days(self) -> int:
+        pairs = len(self.enrollment_pairs) or 1
+        return -(-self.n_attendance // pairs)
+
+    def attendance_row(self, r: int) -> dict:
+        rid = make_id(ATTENDANCE_BASE, r)
+        if rid in self.overlay:
+            return self.overlay[rid]
+        pairs = len(self.enrollment_pairs)
+        sid, cid = self.enrollment_pairs[r % pairs]
+        roll = (r * 2654435761) % 100
+        status = "present" if roll < 80 else "absent" if roll < 90 else "late" if roll < 97 else "stw"
+        day = EPOCH + timedelta(days=r // pairs)
+        return {
+            "id": rid,
+            "student_id": sid,
+            "course_id": cid,
+            "date": iso(day),
+            "status": status,
+            "notes": None if roll % 5 else "Synthetic note",
+            "marked_by": user_id(1),
+            "created_at": iso(day),
+        }
+
+    def attendance_rows(self, filters: list):
+        """Rows matching the filters, newest date first, ids descending within a day"""
+        pairs = len(self.enrollment_pairs)
+        eq = {column: arg for column, op, arg in filters if op == "eq"}
+        if "course_id" in eq:
+            candidates = self.by_course.get(eq["course_id"], [])
+        elif "student_id" in eq:
+            candidates = self.by_student.get(eq["student_id"], [])
+        elif "id" in eq:
+            r = uuid.UUID(eq["id"]).int - ATTENDANCE_BASE
+            candidates = [r % pairs] if 0 <= r < self.n_attendance else []
+        else:
+            candidates = range(pairs)
+
+        days = range(self.n_days)
+        if "date" in eq:
+            day = (datetime.fromisoformat(eq["date"].replace("Z", "+00:00")) - EPOCH).days
+            days = [day] if 0 <= day < self.n_days else []
+
+        candidates = sorted(candidates, reverse=True)
+        for day in reversed(days):
+            for n in candidates:
+                r = day * pairs + n
+                if r >= self.n_attendance:
+                    continue
+                row = self.attendance_row(r)
+                if row["id"] not in self.deleted:
+                    yield row
+        for row in list(self.added.values()):
+            if row["id"] not in self.deleted and all(str(row.get(c)) == v for c, v in eq.items() if c != "date"):
+                yield row
+
+    def rows(self, name: str, filters: list):
+        # Writes here commit at once, so the *_changes views show every row
+        name = name[:-len("_changes")] if name.endswith("_changes") else name
+        if name == "attendance":
+            return self.attendance_rows(filters)
+        if name == "attendance_summary":
+            return iter(self.summary_rows(filters))
+        eq = {column: arg for column, op, arg in filters if op == "eq"}
+        if "id" in eq and name in self.index:
+            row = self.index[name].get(eq["id"])
+            return iter([row] if row else [])
+        return iter(self.tables.get(name, []))
+
+    def status_counts(self, student: str = None, course: str = None,
+                      date_from: str = None, date_to: str = None) -> list:
+        filters = []
+        if student:
+            filters.append(("student_id", "eq", student))
+        if course:
+            filters.append(("course_id", "eq", course))
+        counts = {}
+        for row in self.attendance_rows(filters):
+            if (student and row["student_id"] != student) or (course and row["course_id"] != course):
+                continue
+            if (date_from and row["date"] < date_from) or (date_to and row["date"] > date_to):
+                continue
+            key = (row["student_id"], row["course_id"], row["status"])
+            counts[key] = counts.get(key, 0) + 1
+        return [
+            {"student_id": s, "course_id": c, "status": st, "total": total}
+            for (s, c, st), total in counts.items()
+        ]
+
+    def summary_rows(self, filters: list) -> list:
+        eq = {column: arg for column, op, arg in filters if op == "eq"}
+        summary = {}
+        for row in self.status_counts(eq.get("student_id"), eq.get("course_id")):
+            entry = summary.setdefault((row["student_id"], row["course_id"]), {
+                "student_id": row["student_id"], "course_id": row["course_id"],
+                **{status: 0 for status in STATUSES}, "updated_at": now(),
+            })
+            entry[row["status"]] += row["total"]
+        return list(summary.values())
+
+def parse_filters(params: list) -> list:
+    filters = []
+    for key, value in params:
+        if key in RESERVED_PARAMS:
+            continue
+        op, _, arg = value.partition(".")
+        if op == "in":
+            arg = [v.strip('"') for v in arg.strip("()").split(",") if v]
+        else:
+            arg = arg.strip('"')
+        filters.append((key, op, arg))
+    return filters
+
+def matches(row: dict, filters: list, keyset) -> bool:
+    for column, op, arg in filters:
+        value = row.get(column)
+        text = None if value is None else str(value)
+        if op == "eq" and text != arg:
+            return False
+        if op == "neq" and text == arg:
+            return False
+        if op == "in" and text not in arg:
+            return False
+        if op in ("gt", "gte", "lt", "lte"):
+            if value is None:
+                return False
+            left, right = (value, float(arg)) if isinstance(value, (int, float)) else (text, arg)
+            if (op == "gt" and not left > right) or (op == "gte" and not left >= right) \
+                    or (op == "lt" and not left < right) or (op == "lte" and not left <= right):
+                return False
+        if op == "is" and arg == "null" and value is not None:
+            return False
+    if keyset:
+        column, op, value, _, id_op, last_id = keyset.groups()
+        current, value = comparable(row.get(column), value)
+        row_id, last_id = comparable(row["id"], last_id)
+        after = current > value if op == "gt" else current < value
+        tie = current == value and (row_id > last_id if id_op == "gt" else row_id < last_id)
+        if not (after or tie):
+            return False
+    return True
+
+def comparable(value, arg: str) -> tuple:
+    """A row value and a filter argument in a form that compares like Postgres"""
+    if isinstance(value, int):
+        return value, int(arg)
+    return str(value), arg
+
+def parse_order(order: str) -> list:
+    keys = []
+    for part in order.split(","):
+        bits = part.split(".")
+        keys.append((bits[0], "desc" in bits[1:]))
+    return keys
+
+def sort_key(value):
+    return (value is None, value if isinstance(value, (int, float)) else str(value))
+
+def sort_rows(rows: list, order: list) -> list:
+    for column, desc in reversed(order):
+        rows.sort(key=lambda row: sort_key(row.get(column)), reverse=desc)
+    return rows
+
+EMBED = re.compile(r"^(\w+)(?:!(\w+))?\((.*)\)$")
+
+def project(campus: Campus, rows: list, select: str) -> list:
+    if not select or select == "*":
+        return rows
+    columns = [c for c in re.split(r",(?![^(]*\))", select) if c]
+    projected = []
+    for row in rows:
+        out = {}
+        for column in columns:
+            embed = EMBED.match(column)
+            if column == "*":
+                out.update(row)
+            elif embed:
+                name, hint, _ = embed.groups()
+                fk = hint or f"{name.rstrip('s')}_id"
+                out[name] = campus.index.get(name, {}).get(row.get(fk))
+            else:
+                out[column] = row.get(column)
+        projected.append(out)
+    return projected
+
+class FakeSupabaseHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    campus: Campus = None
+    latency: float = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.payload
+
+    def _dispatch(self, method: str):
+        # Always drain the body (postgrest sends "{}" even on GET) so the
+        # next request on a keep-alive connection starts cleanly
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        self.payload = json.loads(raw) if raw.strip() else None
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlparse(self.path)
+        params = parse_qsl(url.query, keep_blank_values=True)
+        try:
+            if url.path.startswith("/auth/v1/"):
+                return self._auth(method, url.path[len("/auth/v1/"):], dict(params))
+            if url.path.startswith("/rest/v1/rpc/"):
+                return self._rpc(url.path[len("/rest/v1/rpc/"):], self._body() or {})
+            if url.path.startswith("/rest/v1/"):
+                return self._rest(method, url.path[len("/rest/v1/"):], params)
+            if url.path.rstrip("/") == "/rest/v1":
+                return self._reply(200, {"swagger": "2.0"})
+            return self._reply(404, {"message": "Not found"})
+        except Exception as e:
+            return self._reply(500, {"message": str(e)})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _rest(self, method: str, name: str, params: list):
+        campus = self.campus
+        query = dict(params)
+        filters = parse_filters(params)
+        keyset = KEYSET.match(query["or"]) if "or" in query else None
+
+        if method == "GET":
+            order = parse_order(query["order"]) if "order" in query else []
+            limit = int(query["limit"]) if "limit" in query else None
+            selected = (row for row in campus.rows(name, filters) if matches(row, filters, keyset))
+            if name == "attendance" and (not order or order[0] == ("date", True)):
+                # Generated already in (date desc, id desc) order; stream to the limit
+                rows = []
+                for row in selected:
+                    rows.append(row)
+                    if limit is not None and len(rows) >= limit:
+                        break
+            else:
+                rows = sort_rows(list(selected), order)[:limit]
+            return self._reply(200, project(campus, rows, query.get("select", "*")))
+
+        with campus.lock:
+            if method == "POST":
+                inserted = self._insert(name, query)
+                if inserted is None:
+                    return self._reply(409, {
+                        "code": "23505",
+                        "message": "duplicate key value violates unique constraint",
+                        "details": None,
+                        "hint": None,
+                    })
+                return self._reply(201, inserted)
+            changed = [row for row in campus.rows(name, filters) if matches(row, filters, None)]
+            if method == "PATCH":
+                updates = self._body() or {}
+                result = []
+                for row in changed:
+                    row = {**row, **updates, "updated_at": now()}
+                    self._store(name, row)
+                    result.append(row)
+                return self._reply(200, result)
+            if method == "DELETE":
+                for row in changed:
+                    self._remove(name, row)
+                return self._reply(200, changed)
+        return self._reply(405, {"message": "Method not allowed"})
+
+    def _insert(self, name: str, query: dict) -> Optional[list]:
+        """Inserted rows, or None when a row breaks a unique constraint"""
+        body = self._body()
+        rows = body if isinstance(body, list) else [body]
+        conflict = [c for c in query.get("on_conflict", "").split(",") if c]
+        # attendance_session_unique, the one unique index the API relies on
+        unique = conflict or (["student_id", "course_id", "date"] if name == "attendance" else [])
+        prefer = self.headers.get("Prefer", "")
+        result = []
+        for row in rows:
+            existing = None
+            if unique:
+                filters = [(c, "eq", str(row.get(c))) for c in unique]
+                existing = next(
+                    (r for r in self.campus.rows(name, filters) if matches(r, filters, None)), None
+                )
+            if existing is not None and not conflict:
+                return None
+            if existing is not None:
+                if "ignore-duplicates" in prefer:
+                    continue
+                row = {**existing, **row, "updated_at": now()}
+            else:
+                stamp = now()
+                row = {"id": str(uuid.uuid4()), "created_at": stamp, "updated_at": stamp, **row}
+                if row["created_at"] == "now()":
+                    row["created_at"] = stamp
+            self._store(name, row)
+            result.append(row)
+        return result
+
+    def _store(self, name: str, row: dict) -> None:
+        campus = self.campus
+        if name in ("events", "announcements"):
+            row["change_seq"] = campus.next_change_seq()
+        if name == "attendance":
+            # Generated rows are edited through the overlay; anything else was inserted
+            if not 0 <= uuid.UUID(row["id"]).int - ATTENDANCE_BASE < campus.n_attendance:
+                campus.added[row["id"]] = row
+            else:
+                campus.overlay[row["id"]] = row
+            return
+        if name in campus.index:
+            if row["id"] not in campus.index[name]:
+                campus.tables[name].append(row)
+            else:
+                position = campus.tables[name].index(campus.index[name][row["id"]])
+                campus.tables[name][position] = row
+            campus.index[name][row["id"]] = row
+        elif name in campus.tables:
+            campus.tables[name].append(row)
+
+    def _remove(self, name: str, row: dict) -> None:
+        campus = self.campus
+        if name == "attendance":
+            campus.deleted.add(row["id"])
+            return
+        if name in campus.index:
+            campus.index[name].pop(row["id"], None)
+        campus.tables[name] = [r for r in campus.tables.get(name, []) if r["id"] != row["id"]]
+        if name in ("events", "announcements"):
+            campus.tables["deleted_records"].append({
+                "id": len(campus.tables["deleted_records"]) + 1,
+                "table_name": name,
+                "record_id": row["id"],
+                "deleted_at": now(),
+                "change_seq": campus.next_change_seq(),
+            })
+
+    def _rpc(self, function: str, params: dict):
+        campus = self.campus
+        if function == "attendance_status_counts":
+            return self._reply(200, campus.status_counts(
+                params.get("p_student_id"), params.get("p_course_id"),
+                params.get("p_date_from"), params.get("p_date_to"),
+            ))
+        if function == "rebuild_attendance_summary":
+            return self._reply(200, len(campus.enrollment_pairs))
+        return self._reply(404, {"message": f"Unknown function {function}"})
+
+    def _auth_user(self, row: dict) -> dict:
+        return {
+            "id": row["id"],
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": row["email"],
+            "app_metadata": {"provider": "email"},
+            "user_metadata": {},
+            "created_at": row["created_at"],
+        }
+
+    def _auth(self, method: str, path: str, query: dict):
+        campus = self.campus
+        if path == "health":
+            return self._reply(200, {"version": "fake", "name": "GoTrue"})
+        if path == "logout":
+            return self._reply(204)
+        if path == "token" and query.get("grant_type") == "password":
+            body = self._body() or {}
+            user = next((u for u in campus.tables["users"] if u["email"] == body.get("email")), None)
+            if user is None or body.get("password") != PASSWORD:
+                return self._reply(400, {"error": "invalid_grant", "error_description": "Invalid login credentials"})
+            return self._reply(200, {
+                "access_token": f"fake-{user['id']}",
+                "token_type": "bearer",
+                "expires_in": 3600,
+                "expires_at": int(time.time()) + 3600,
+                "refresh_token": uuid.uuid4().hex,
+                "user": self._auth_user(user),
+            })
+        if path == "admin/users" and method == "POST":
+            body = self._body() or {}
+            return self._reply(200, self._auth_user({
+                "id": str(uuid.uuid4()), "email": body.get("email"), "created_at": now()
+            }))
+        return self._reply(404, {"message": "Not found"})
+
+def build_campus(args) -> Campus:
+    return Campus(
+        users=args.users, teachers=args.teachers, courses=args.courses,
+        per_student=args.per_student, attendance=args.attendance,
+        events=args.events, announcements=args.announcements,
+    )
+
+def add_dataset_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--teachers", type=int, default=200)
+    parser.add_argument("--courses", type=int, default=300)
+    parser.add_argument("--per-student", type=int, default=6, help="Enrollments per student")
+    parser.add_argument("--attendance", type=int, default=2_000_000)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--announcements", type=int, default=2000)
+
+def serve(campus: Campus, port: int, latency: float = 0.0) -> ThreadingHTTPServer:
+    """Start the fake server on a background thread"""
+    FakeSupabaseHandler.campus = campus
+    FakeSupabaseHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeSupabaseHandler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    server = serve(build_campus(args), args.port, args.latency)
+    print(f"Fake Supabase listening on http://127.0.0.1:{args.port}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
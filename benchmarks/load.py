@@ -0,0 +1,275 @@
+"""Load test every router against the fake Supabase server.
+
+Starts benchmarks.fake_supabase and the API (uvicorn) as subprocesses, drives
+each scenario at the given concurrency and reports p50/p95/p99 latency,
+throughput, errors and the API worker's peak RSS.
+
+    python -m benchmarks.load --requests 500 --concurrency 50
+    python -m benchmarks.load --only events --json results.json
+    python -m benchmarks.load --baseline results.json --tolerance 0.2
+    python -m benchmarks.load --env TOKEN_CACHE_SIZE=0 --json no-cache.json
+
+With --baseline the run exits non-zero when any scenario's p95 latency or
+throughput regresses by more than the tolerance. --env passes settings to the
+API process, so a feature can be compared on and off against one baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+BENCHMARK_ENV = {
+    "SUPABASE_KEY": "fake-anon-key",
+    "SUPABASE_SERVICE_KEY": "fake-service-key",
+    "SECRET_KEY": "benchmark-secret",
+}
+
+for key, value in BENCHMARK_ENV.items():
+    os.environ.setdefault(key, value)
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+
+import httpx
+
+from app.core.security import create_access_token
+from benchmarks import fake_supabase as fake
+
+class Scenario(NamedTuple):
+    router: str
+    name: str
+    method: str
+    path: str
+    user: str
+    body: Optional[Callable[[int], dict]] = None
+
+ADMIN, TEACHER, STUDENT = fake.user_id(0), fake.user_id(1), fake.user_id(250)
+COURSE, EVENT, ANNOUNCEMENT = fake.course_id(5), fake.event_id(7), fake.announcement_id(11)
+
+def _bulk_session(i: int) -> dict:
+    return {
+        "course_id": COURSE,
+        "date": datetime(2026, 1, 1 + i % 28, 9, tzinfo=timezone.utc).isoformat(),
+        "records": [
+            {"student_id": fake.user_id(201 + n), "status": "present"} for n in range(40)
+        ],
+    }
+
+def _batch(id_for: Callable[[int], str]) -> Callable[[int], dict]:
+    """A roster-sized batch of ids, shifted per request"""
+    return lambda i: {"ids": [id_for(1 + (i + n) % 40) for n in range(40)]}
+
+SCENARIOS: List[Scenario] = [
+    Scenario("auth", "login", "POST", "/api/auth/login", "",
+             lambda i: {"email": f"user{250 + i % 1000}@campus.edu", "password": fake.PASSWORD}),
+    Scenario("users", "me", "GET", "/api/users/me", STUDENT),
+    Scenario("users", "list", "GET", "/api/users/?limit=100", ADMIN),
+    Scenario("users", "by_id", "GET", f"/api/users/{TEACHER}", STUDENT),
+    Scenario("users", "batch", "POST", "/api/users/batch", STUDENT, _batch(fake.user_id)),
+    Scenario("users", "by_role", "GET", "/api/users/role/teacher?limit=100", STUDENT),
+    Scenario("courses", "list", "GET", "/api/courses/?limit=100", STUDENT),
+    Scenario("courses", "by_id", "GET", f"/api/courses/{COURSE}", STUDENT),
+    Scenario("courses", "batch", "POST", "/api/courses/batch", STUDENT, _batch(fake.course_id)),
+    Scenario("courses", "student", "GET", f"/api/courses/student/{STUDENT}", STUDENT),
+    Scenario("courses", "roster", "GET", f"/api/courses/{COURSE}/students", TEACHER),
+    Scenario("attendance", "course", "GET", f"/api/attendance/course/{COURSE}?limit=200", TEACHER),
+    Scenario("attendance", "student", "GET", f"/api/attendance/student/{STUDENT}?limit=200", STUDENT),
+    Scenario("attendance", "stats", "GET", f"/api/attendance/stats/course/{COURSE}", TEACHER),
+    Scenario("attendance", "summary", "GET", f"/api/attendance/summary/student/{STUDENT}", STUDENT),
+    Scenario("attendance", "bulk", "POST", "/api/attendance/bulk", TEACHER, _bulk_session),
+    Scenario("events", "list", "GET", "/api/events/?limit=100", STUDENT),
+    Scenario("events", "by_id", "GET", f"/api/events/{EVENT}", STUDENT),
+    Scenario("events", "batch", "POST", "/api/events/batch", STUDENT, _batch(fake.event_id)),
+    Scenario("events", "changes", "GET", "/api/events/changes?limit=100", STUDENT),
+    Scenario("announcements", "list", "GET", "/api/announcements/?limit=100", STUDENT),
+    Scenario("announcements", "by_id", "GET", f"/api/announcements/{ANNOUNCEMENT}", STUDENT),
+    Scenario("announcements", "changes", "GET", "/api/announcements/changes?limit=100", STUDENT),
+]
+
+ROLES = {ADMIN: "admin", TEACHER: "teacher", STUDENT: "student"}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a process, from /proc or psutil if available"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+async def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"API process exited with status {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int,
+                       concurrency: int, api_pid: int) -> dict:
+    headers = {}
+    if scenario.user:
+        token = create_access_token({"sub": scenario.user, "role": ROLES[scenario.user]})
+        headers["Authorization"] = f"Bearer {token}"
+
+    latencies: List[float] = []
+    errors = 0
+    wire_bytes = 0
+    peak_rss = rss_bytes(api_pid) or 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors, wire_bytes
+        async with semaphore:
+            body = scenario.body(i) if scenario.body else None
+            started = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, scenario.path, json=body, headers=headers)
+                if response.status_code >= 400:
+                    errors += 1
+                # Bytes as received, before httpx decodes gzip/br
+                wire_bytes += response.num_bytes_downloaded
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, rss_bytes(api_pid) or 0)
+            await asyncio.sleep(0.25)
+
+    sampler = asyncio.create_task(sample_rss())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+
+    return {
+        "scenario": f"{scenario.router}.{scenario.name}",
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": peak_rss / 2 ** 20,
+        "kb_per_response": wire_bytes / requests / 1024,
+    }
+
+def print_results(results: List[dict]) -> None:
+    header = f"{'scenario':<26}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'rss MB':>9}{'KB/resp':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<26}{r['throughput']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              f"{r['p99_ms']:>9.1f}{r['errors']:>8}{r['peak_rss_mb']:>9.1f}"
+              f"{r.get('kb_per_response', 0):>9.1f}")
+
+def find_regressions(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """Scenarios whose p95 or throughput moved more than tolerance from the baseline"""
+    previous = {r["scenario"]: r for r in baseline}
+    regressions = []
+    for r in results:
+        base = previous.get(r["scenario"])
+        if base is None:
+            continue
+        if r["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{r['scenario']}: p95 {base['p95_ms']:.1f} -> {r['p95_ms']:.1f} ms")
+        if r["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{r['scenario']}: {base['throughput']:.1f} -> {r['throughput']:.1f} req/s")
+    return regressions
+
+async def drive(args, api_url: str, api: subprocess.Popen) -> List[dict]:
+    api_pid = api.pid
+    await wait_until_up(f"{api_url}/health", api)
+    scenarios = [s for s in SCENARIOS if not args.only or s.router in args.only]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=api_url, limits=limits, timeout=60) as client:
+        # One warm-up pass so caches and connections are comparable across runs
+        for scenario in scenarios:
+            await run_scenario(client, scenario, min(args.concurrency, args.requests), args.concurrency, api_pid)
+        return [
+            await run_scenario(client, scenario, args.requests, args.concurrency, api_pid)
+            for scenario in scenarios
+        ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005, help="Fake Supabase latency per call (s)")
+    parser.add_argument("--only", nargs="*", help="Routers to run, e.g. events attendance")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json output")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="Settings for the API process")
+    fake.add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    stub_port, api_port = free_port(), free_port()
+    env = {**os.environ, **BENCHMARK_ENV, "SUPABASE_URL": f"http://127.0.0.1:{stub_port}"}
+    dataset = [
+        "--users", str(args.users), "--teachers", str(args.teachers), "--courses", str(args.courses),
+        "--per-student", str(args.per_student), "--attendance", str(args.attendance),
+        "--events", str(args.events), "--announcements", str(args.announcements),
+    ]
+
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_supabase", "--port", str(stub_port),
+         "--latency", str(args.latency), *dataset],
+        env=env
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning"],
+        env={**env, **dict(item.split("=", 1) for item in args.env)}
+    )
+    try:
+        results = asyncio.run(drive(args, f"http://127.0.0.1:{api_port}", api))
+    finally:
+        api.terminate()
+        stub.terminate()
+        api.wait()
+        stub.wait()
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(results, out, indent=2)
+    if args.baseline:
+        with open(args.baseline) as previous:
+            regressions = find_regressions(results, json.load(previous), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
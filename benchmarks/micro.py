@@ -0,0 +1,145 @@
+"""Micro-benchmarks for the per-request hot paths: JWT, bcrypt, schemas and
+list serialization.
+
+Each case is timed with timeit and reported as microseconds per call (best
+of --repeat runs). Rows for the schema cases come from the fake Supabase
+dataset so they have realistic shapes.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --json micro.json
+    python -m benchmarks.micro --baseline micro.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict, List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "fake-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "fake-service-key")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from app.core.security import (
+    create_access_token,
+    decode_access_token,
+    get_password_hash,
+    shutdown_hash_pool,
+    verify_access_token,
+    verify_password,
+    verify_password_async,
+)
+from app.api.serialization import FastJSONResponse, trusted_rows
+from app.models.schemas import Announcement, Attendance, Course, Event, User
+from benchmarks import fake_supabase as fake
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    campus = fake.Campus(
+        users=300, teachers=20, courses=20, per_student=2,
+        attendance=5000, events=100, announcements=100,
+    )
+    users = campus.tables["users"][:100]
+    courses = campus.tables["courses"][:100]
+    events = campus.tables["events"][:100]
+    announcements = campus.tables["announcements"][:100]
+    attendance = [campus.attendance_row(r) for r in range(100)]
+
+    claims = {"sub": fake.user_id(250), "role": "student"}
+    token = create_access_token(claims)
+    hashed = get_password_hash(fake.PASSWORD)
+
+    attendance_1k = [campus.attendance_row(r) for r in range(1000)]
+    attendance_10k = [campus.attendance_row(r) for r in range(10000)]
+    attendance_field = create_response_field("Response", List[Attendance])
+
+    def pydantic_list(rows: List[dict]) -> bytes:
+        # What a handler returning List[Attendance] costs: build models, then
+        # FastAPI validates them again against response_model and json-encodes
+        async def render():
+            content = await serialize_response(
+                field=attendance_field, response_content=[Attendance(**row) for row in rows]
+            )
+            return JSONResponse(content).body
+        return asyncio.run(render())
+
+    def fast_list(rows: List[dict]) -> bytes:
+        return FastJSONResponse(trusted_rows(rows, Attendance)).body
+
+    async def verify_concurrently():
+        await asyncio.gather(*(verify_password_async(fake.PASSWORD, hashed) for _ in range(8)))
+
+    return {
+        "jwt.create": lambda: create_access_token(claims),
+        "jwt.decode": lambda: decode_access_token(token),
+        "jwt.decode_uncached": lambda: verify_access_token(token),
+        "bcrypt.hash": lambda: get_password_hash(fake.PASSWORD),
+        "bcrypt.verify": lambda: verify_password(fake.PASSWORD, hashed),
+        "bcrypt.verify_x8": lambda: [verify_password(fake.PASSWORD, hashed) for _ in range(8)],
+        "bcrypt.verify_async_x8": lambda: asyncio.run(verify_concurrently()),
+        "schema.user": lambda: User(**users[0]),
+        "schema.users_x100": lambda: [User(**row) for row in users],
+        "schema.courses_x100": lambda: [Course(**row) for row in courses],
+        "schema.attendance_x100": lambda: [Attendance(**row) for row in attendance],
+        "schema.events_x100": lambda: [Event(**row) for row in events],
+        "schema.announcements_x100": lambda: [Announcement(**row) for row in announcements],
+        "list.pydantic_1k": lambda: pydantic_list(attendance_1k),
+        "list.fast_1k": lambda: fast_list(attendance_1k),
+        "list.pydantic_10k": lambda: pydantic_list(attendance_10k),
+        "list.fast_10k": lambda: fast_list(attendance_10k),
+    }
+
+def measure(func: Callable[[], object], repeat: int, budget: float) -> float:
+    """Best-of-repeat microseconds per call, sizing loops to roughly budget seconds"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * budget / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+def find_regressions(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    previous = {r["case"]: r for r in baseline}
+    return [
+        f"{r['case']}: {previous[r['case']]['us_per_call']:.1f} -> {r['us_per_call']:.1f} us"
+        for r in results
+        if r["case"] in previous
+        and r["us_per_call"] > previous[r["case"]]["us_per_call"] * (1 + tolerance)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", help="Case prefixes to run, e.g. jwt schema")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.2, help="Seconds per timing run")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json output")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = []
+    for case, func in build_cases().items():
+        if args.only and not any(case.startswith(prefix) for prefix in args.only):
+            continue
+        results.append({"case": case, "us_per_call": measure(func, args.repeat, args.budget)})
+    shutdown_hash_pool()
+
+    print(f"{'case':<28}{'us/call':>12}")
+    for r in results:
+        print(f"{r['case']:<28}{r['us_per_call']:>12.1f}")
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(results, out, indent=2)
+    if args.baseline:
+        with open(args.baseline) as previous:
+            regressions = find_regressions(results, json.load(previous), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
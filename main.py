@@ -1,12 +1,30 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, users, courses, attendance, events, announcements
+from app.api import auth, users, courses, attendance, events, announcements, stream, profiling
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.health import loop_monitor, readiness
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.resilience import CLOSED, breaker_states
+from app.core.security import shutdown_hash_pool
+from app.core.supabase import supabase_pool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    supabase_pool.start()
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    supabase_pool.close()
+    shutdown_hash_pool()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    description="mE n CAMPUS - Campus Management System API"
+    description="mE n CAMPUS - Campus Management System API",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -16,8 +34,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing", "X-Profile-Id"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+app.add_middleware(profiling.ProfilingMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
@@ -25,6 +52,8 @@ app.include_router(courses.router, prefix="/api/courses", tags=["Courses"])
 app.include_router(attendance.router, prefix="/api/attendance", tags=["Attendance"])
 app.include_router(events.router, prefix="/api/events", tags=["Events"])
 app.include_router(announcements.router, prefix="/api/announcements", tags=["Announcements"])
+app.include_router(stream.router, prefix="/api/stream", tags=["Stream"])
+app.include_router(profiling.router, prefix="/api/profiles", tags=["Profiling"])
 
 @app.get("/")
 async def root():
@@ -36,4 +65,25 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    circuits = breaker_states()
+    healthy = all(circuit["state"] == CLOSED for circuit in circuits.values())
+    return {"status": "healthy" if healthy else "degraded", "circuits": circuits}
+
+@app.get("/health/live")
+async def liveness_check():
+    """The worker is running and its event loop responds"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Whether the worker should receive traffic; 503 when Supabase is
+    unreachable, a circuit is open or the worker is overloaded"""
+    report = await readiness()
+    status_code = status.HTTP_200_OK if report["status"] == "ready" else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(content=report, status_code=status_code)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this worker"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,18 @@
+-- One attendance record per student per course session.
+-- Required by POST /api/attendance/bulk, which upserts on these columns.
+
+-- POST /api/attendance/ used to accept the same session twice; keep only the
+-- most recently created record of each before enforcing uniqueness.
+delete from public.attendance a
+using (
+    select id, row_number() over (
+        partition by student_id, course_id, date
+        order by created_at desc, id desc
+    ) as position
+    from public.attendance
+) ranked
+where a.id = ranked.id
+  and ranked.position > 1;
+
+create unique index if not exists attendance_student_course_date_key
+    on public.attendance (student_id, course_id, date);
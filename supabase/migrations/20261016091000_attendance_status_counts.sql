@@ -0,0 +1,26 @@
+-- Attendance counts grouped by student, course and status.
+-- Backs GET /api/attendance/stats/*, so rates are computed in the database
+-- instead of shipping raw attendance rows to the API.
+create index if not exists attendance_course_date_idx
+    on public.attendance (course_id, date);
+create index if not exists attendance_student_date_idx
+    on public.attendance (student_id, date);
+
+create or replace function public.attendance_status_counts(
+    p_student_id uuid default null,
+    p_course_id uuid default null,
+    p_date_from timestamptz default null,
+    p_date_to timestamptz default null
+)
+returns table (student_id uuid, course_id uuid, status text, total bigint)
+language sql
+stable
+as $$
+    select a.student_id, a.course_id, a.status::text, count(*)
+    from public.attendance a
+    where (p_student_id is null or a.student_id = p_student_id)
+      and (p_course_id is null or a.course_id = p_course_id)
+      and (p_date_from is null or a.date >= p_date_from)
+      and (p_date_to is null or a.date <= p_date_to)
+    group by a.student_id, a.course_id, a.status
+$$;
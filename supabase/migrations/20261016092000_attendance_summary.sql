@@ -0,0 +1,65 @@
+-- Per (student, course) attendance counters maintained incrementally by the
+-- API write paths. Dashboards read these rows instead of scanning attendance.
+create table if not exists public.attendance_summary (
+    student_id uuid not null,
+    course_id uuid not null,
+    present integer not null default 0,
+    absent integer not null default 0,
+    late integer not null default 0,
+    stw integer not null default 0,
+    updated_at timestamptz not null default now(),
+    primary key (student_id, course_id)
+);
+
+create index if not exists attendance_summary_course_idx
+    on public.attendance_summary (course_id);
+
+-- Add signed per-status deltas. Expects at most one entry per
+-- (student_id, course_id) in p_deltas.
+create or replace function public.apply_attendance_summary_deltas(p_deltas jsonb)
+returns void
+language sql
+as $$
+    insert into public.attendance_summary as s (student_id, course_id, present, absent, late, stw)
+    select
+        (d->>'student_id')::uuid,
+        (d->>'course_id')::uuid,
+        coalesce((d->>'present')::integer, 0),
+        coalesce((d->>'absent')::integer, 0),
+        coalesce((d->>'late')::integer, 0),
+        coalesce((d->>'stw')::integer, 0)
+    from jsonb_array_elements(p_deltas) as d
+    on conflict (student_id, course_id) do update set
+        present = s.present + excluded.present,
+        absent = s.absent + excluded.absent,
+        late = s.late + excluded.late,
+        stw = s.stw + excluded.stw,
+        updated_at = now();
+$$;
+
+-- Recompute every counter from the raw attendance table.
+create or replace function public.rebuild_attendance_summary()
+returns integer
+language plpgsql
+as $$
+declare
+    rebuilt integer;
+begin
+    lock table public.attendance_summary in exclusive mode;
+    delete from public.attendance_summary;
+
+    insert into public.attendance_summary (student_id, course_id, present, absent, late, stw)
+    select
+        student_id,
+        course_id,
+        count(*) filter (where status::text = 'present'),
+        count(*) filter (where status::text = 'absent'),
+        count(*) filter (where status::text = 'late'),
+        count(*) filter (where status::text = 'stw')
+    from public.attendance
+    group by student_id, course_id;
+
+    get diagnostics rebuilt = row_count;
+    return rebuilt;
+end;
+$$;
@@ -0,0 +1,21 @@
+-- One enrollment per student per course. Lets POST /api/courses/enroll
+-- insert with on_conflict instead of a separate existence check.
+
+-- The enroll endpoint used to allow enrolling twice; keep the earliest
+-- enrollment of each student/course pair before enforcing uniqueness.
+delete from public.enrollments e
+using (
+    select id, row_number() over (
+        partition by student_id, course_id
+        order by enrolled_at, id
+    ) as position
+    from public.enrollments
+) ranked
+where e.id = ranked.id
+  and ranked.position > 1;
+
+create unique index if not exists enrollments_student_course_key
+    on public.enrollments (student_id, course_id);
+
+create index if not exists enrollments_course_idx
+    on public.enrollments (course_id);
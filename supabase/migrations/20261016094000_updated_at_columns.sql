@@ -0,0 +1,27 @@
+-- Track the last modification of read-mostly resources. Used for ETag /
+-- Last-Modified validators and the changes-since-cursor endpoints.
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$;
+
+alter table public.courses add column if not exists updated_at timestamptz not null default now();
+alter table public.events add column if not exists updated_at timestamptz not null default now();
+alter table public.announcements add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists courses_set_updated_at on public.courses;
+create trigger courses_set_updated_at before update on public.courses
+    for each row execute function public.set_updated_at();
+
+drop trigger if exists events_set_updated_at on public.events;
+create trigger events_set_updated_at before update on public.events
+    for each row execute function public.set_updated_at();
+
+drop trigger if exists announcements_set_updated_at on public.announcements;
+create trigger announcements_set_updated_at before update on public.announcements
+    for each row execute function public.set_updated_at();
@@ -0,0 +1,33 @@
+-- Tombstones for deleted rows, read by the changes-since-cursor endpoints
+-- so offline clients can drop records they have cached.
+create table if not exists public.deleted_records (
+    id bigint generated always as identity primary key,
+    table_name text not null,
+    record_id text not null,
+    deleted_at timestamptz not null default now()
+);
+
+create index if not exists deleted_records_table_id_idx
+    on public.deleted_records (table_name, id);
+
+create or replace function public.record_deletion()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into public.deleted_records (table_name, record_id)
+    values (tg_table_name, old.id::text);
+    return old;
+end;
+$$;
+
+drop trigger if exists events_record_deletion on public.events;
+create trigger events_record_deletion after delete on public.events
+    for each row execute function public.record_deletion();
+
+drop trigger if exists announcements_record_deletion on public.announcements;
+create trigger announcements_record_deletion after delete on public.announcements
+    for each row execute function public.record_deletion();
+
+create index if not exists events_updated_at_idx on public.events (updated_at, id);
+create index if not exists announcements_updated_at_idx on public.announcements (updated_at, id);
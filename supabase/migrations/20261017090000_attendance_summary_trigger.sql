@@ -0,0 +1,63 @@
+-- Maintain attendance_summary inside the attendance write's own transaction.
+-- The API used to apply +1/-1 deltas after reading the previous status, so
+-- concurrent submissions of the same session (a client retrying after a
+-- timeout) were counted twice and a write committed after a 504 was never
+-- counted at all.
+
+create or replace function public.bump_attendance_summary(
+    p_student_id uuid,
+    p_course_id uuid,
+    p_status text,
+    p_step integer
+)
+returns void
+language sql
+as $$
+    insert into public.attendance_summary as s (student_id, course_id, present, absent, late, stw)
+    values (
+        p_student_id,
+        p_course_id,
+        case when p_status = 'present' then p_step else 0 end,
+        case when p_status = 'absent' then p_step else 0 end,
+        case when p_status = 'late' then p_step else 0 end,
+        case when p_status = 'stw' then p_step else 0 end
+    )
+    on conflict (student_id, course_id) do update set
+        present = s.present + excluded.present,
+        absent = s.absent + excluded.absent,
+        late = s.late + excluded.late,
+        stw = s.stw + excluded.stw,
+        updated_at = now();
+$$;
+
+create or replace function public.sync_attendance_summary()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'UPDATE'
+        and old.status is not distinct from new.status
+        and old.student_id = new.student_id
+        and old.course_id = new.course_id then
+        return null;
+    end if;
+
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform public.bump_attendance_summary(old.student_id, old.course_id, old.status::text, -1);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform public.bump_attendance_summary(new.student_id, new.course_id, new.status::text, 1);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists attendance_sync_summary on public.attendance;
+create trigger attendance_sync_summary
+    after insert or update or delete on public.attendance
+    for each row execute function public.sync_attendance_summary();
+
+drop function if exists public.apply_attendance_summary_deltas(jsonb);
+
+-- Counters written by the old API path may have drifted; start from the raw rows.
+select public.rebuild_attendance_summary();
@@ -0,0 +1,52 @@
+-- Order the changes feeds by the transaction that wrote each row instead of
+-- updated_at. now() is the transaction's start time, so a write committing
+-- after a client synced could sort behind that client's cursor and never be
+-- sent; a sequence value has the same problem, as nextval() runs before the
+-- commit. change_seq is the writing transaction's id, and the *_changes views
+-- only show rows of transactions older than every one still running, so a
+-- row that becomes visible later always sorts after the cursors handed out.
+-- An open transaction holds the feeds back until it ends.
+
+create or replace function public.set_change_seq()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.change_seq = pg_current_xact_id()::text::bigint;
+    return new;
+end;
+$$;
+
+alter table public.events
+    add column if not exists change_seq bigint not null default pg_current_xact_id()::text::bigint;
+alter table public.announcements
+    add column if not exists change_seq bigint not null default pg_current_xact_id()::text::bigint;
+alter table public.deleted_records
+    add column if not exists change_seq bigint not null default pg_current_xact_id()::text::bigint;
+
+drop trigger if exists events_set_change_seq on public.events;
+create trigger events_set_change_seq before insert or update on public.events
+    for each row execute function public.set_change_seq();
+
+drop trigger if exists announcements_set_change_seq on public.announcements;
+create trigger announcements_set_change_seq before insert or update on public.announcements
+    for each row execute function public.set_change_seq();
+
+create index if not exists events_change_seq_idx on public.events (change_seq, id);
+create index if not exists announcements_change_seq_idx on public.announcements (change_seq, id);
+create index if not exists deleted_records_table_change_seq_idx
+    on public.deleted_records (table_name, change_seq, id);
+
+-- select * is expanded when the view is created; recreate the views after
+-- adding columns to events or announcements
+create or replace view public.events_changes with (security_invoker = true) as
+    select * from public.events
+    where change_seq < pg_snapshot_xmin(pg_current_snapshot())::text::bigint;
+
+create or replace view public.announcements_changes with (security_invoker = true) as
+    select * from public.announcements
+    where change_seq < pg_snapshot_xmin(pg_current_snapshot())::text::bigint;
+
+create or replace view public.deleted_records_changes with (security_invoker = true) as
+    select * from public.deleted_records
+    where change_seq < pg_snapshot_xmin(pg_current_snapshot())::text::bigint;